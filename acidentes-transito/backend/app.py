@@ -1,162 +1,541 @@
-from flask import Flask, jsonify
+from flask import Blueprint, Flask, jsonify, request, Response, g
 from flask_cors import CORS
-from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
 import pandas as pd
-import numpy as np
 
-from src.carga_dados import carregar_dados
-from src.modelo_svr import modelar_svr
-from src.dados_grafico import preparar_dados_graficos
-from src.utils import limpar_descricao, extrair_hora
-from firebase_config import db  # Importa conexão com Firebase
+from src.cache_dados import PASTA_CACHE
+from src.carga_dados import carregar_base
+from src.cubo import graficos_do_cubo, serie_diaria
+from src.registro_modelos import obter_modelo
+from src.tarefas import iniciar_tarefa, status_tarefa
+from src.persistencia import gravar_documentos, executar_em_segundo_plano, ler_documento, listar_documentos
+from src import metricas
 
-app = Flask(__name__)
-CORS(app)
+api = Blueprint('api', __name__)
 
 # ========================================================
-# Carregamento inicial de dados
+# Estado da aplicação (preenchido por aquecer)
 # ========================================================
-df, dados_graficos = carregar_dados()
+# Dados usados pelos gráficos; 'versao' muda a cada troca do cubo e entra na
+# chave do cache de gráficos filtrados
+dados = {'cubo': None, 'graficos_padrao': None, 'versao': 0}
 
-# Limpeza e padronização
-df['descricao_limpa'] = df['descricao'].fillna('').apply(limpar_descricao)
-df['hora_limpa'] = df['hora'].apply(extrair_hora)
-df.rename(columns={'ï»¿data': 'i_data'}, inplace=True)
+# Período da série usada na modelagem, da cidade e dos bairros
+INICIO_SERIE = '2021-01-01'
+FIM_SERIE = '2024-12-31'
 
+# O modelo servido fica em um único dicionário (série, resultado, metadados e
+# respostas já serializadas), substituído por inteiro quando um retreino
+# termina: as rotas leem a referência uma vez e nunca veem uma série de um
+# modelo com o resultado de outro.
+modelo_atual = {'serie': None, 'resultado': None, 'metadados': None, 'bairros': {}, 'respostas': {}}
 
-def parse_date_column(col):
-    dt = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-    mask = dt.isna() & df[col].notna()
-    dt.loc[mask] = pd.to_datetime(df.loc[mask, col], errors='coerce', dayfirst=False)
-    return dt
+# As respostas só mudam quando o modelo é trocado: o cliente guarda a resposta
+# e revalida com If-None-Match, recebendo 304 enquanto o ETag for o mesmo
+CACHE_CONTROL_MODELO = 'public, no-cache'
 
+_trava_aquecimento = threading.Lock()
+_aquecido = False
+_gravacao_pendente = False   # previsões do aquecimento ainda não gravadas (ver aquecer)
 
-df['data_dt'] = parse_date_column('data')
-df['DATA_dt'] = parse_date_column('DATA')
-df['i_data_dt'] = parse_date_column('i_data')
+# Com vários workers (gunicorn), o retreino roda em um só deles: o modelo novo
+# é publicado neste arquivo e os demais o carregam na requisição seguinte
+ARQUIVO_MODELO_SERVIDO = os.path.join(PASTA_CACHE, 'modelo_servido.joblib')
+_trava_sincronizacao = threading.Lock()
+_modelo_publicado = None   # versão do arquivo (mtime) já servida por este processo
 
-df['data_unificada'] = df['data_dt']
-mask = df['data_unificada'].isna()
-df.loc[mask, 'data_unificada'] = df.loc[mask, 'DATA_dt']
-mask = df['data_unificada'].isna()
-df.loc[mask, 'data_unificada'] = df.loc[mask, 'i_data_dt']
 
-# Série até 31/12/2024
-df_com_data = df[df['data_unificada'].notnull()].copy()
-df_com_data['data_unificada'] = pd.to_datetime(df_com_data['data_unificada'])
-serie = df_com_data.groupby('data_unificada').size()
-serie = serie.asfreq('D')
-serie = serie.loc[:'2024-12-31']
-serie = serie[serie.index >= '2021-01-01']
+def preparar_series(cubo):
+    """
+    Série diária da cidade no período de modelagem (INICIO_SERIE a FIM_SERIE),
+    a mesma no aquecimento e no retreino, para que o registro de modelos
+    reconheça a série e o modelo servido não dependa de qual caminho o treinou.
+    """
+    serie = serie_diaria(cubo).asfreq('D')
+    serie = serie.loc[:FIM_SERIE]
+    return serie[serie.index >= INICIO_SERIE]
+
+
+def atualizar_dados(cubo):
+    """
+    Troca o cubo usado pelos gráficos e descarta os gráficos já calculados.
+    """
+    dados['cubo'] = cubo
+    dados['graficos_padrao'] = _serializar(graficos_do_cubo(cubo))
+    dados['versao'] += 1
+    graficos_filtrados.cache_clear()
+
+
+def aquecer(n_jobs=-1, gravar=True):
+    """
+    Carrega os dados, monta os gráficos e carrega (ou treina) os modelos.
+    Chamada explicitamente por create_app ou, se ela foi criada com
+    aquecer_agora=False, na primeira requisição.
+
+    Parâmetros:
+    - n_jobs: processos usados nos treinos, como no joblib. No mestre do
+      gunicorn deve ser 1: um pool do joblib criado antes do fork trava o
+      Parallel nos workers
+    - gravar: envia as previsões à persistência. Com False a gravação fica
+      pendente e é feita por gravar_pendentes, já no worker, para que a
+      thread de gravação e o cliente do Firestore não nasçam no mestre
+    """
+    global modelo_atual, _aquecido, _modelo_publicado, _gravacao_pendente
+    with _trava_aquecimento:
+        if _aquecido:
+            return
+
+        # Bibliotecas de modelagem só são importadas aqui
+        from src.modelo_svr import modelar_svr, PARAMETROS_SVR
+        from src.previsao_bairros import prever_bairros
+
+        inicio = time.perf_counter()
+        # Publicações de execuções anteriores não substituem o modelo do aquecimento
+        _modelo_publicado = _versao_publicada()
+
+        # ========================================================
+        # Carregamento inicial de dados
+        # ========================================================
+        _, cubo = carregar_base()
+        serie = preparar_series(cubo)
+        atualizar_dados(cubo)
+
+        # ========================================================
+        # Modelo SVR: lido do registro em disco; só é treinado se a série mudou
+        # ========================================================
+        print("Carregando modelo SVR (série até 31/12/2024)...")
+        try:
+            cached_result, metadados_modelo = obter_modelo('svr', serie, partial(modelar_svr, n_jobs=n_jobs),
+                                                           PARAMETROS_SVR)
+            print("Modelo (treino/teste) armazenado em cache.")
+        except Exception as e:
+            print(f"Erro ao treinar modelo: {e}")
+            cached_result, metadados_modelo = None, None
+
+        # Previsões de todos os bairros, no mesmo período da série da cidade
+        try:
+            previsoes_bairros = prever_bairros(cubo, inicio=INICIO_SERIE, fim=FIM_SERIE, n_jobs=n_jobs)
+        except Exception as e:
+            print(f"Erro ao prever bairros: {e}")
+            previsoes_bairros = {}
+
+        modelo_atual = montar_modelo(serie, cached_result, metadados_modelo, previsoes_bairros)
+
+        # Salva automaticamente ao iniciar (ou no worker, ver gravar_pendentes)
+        if gravar:
+            salvar_previsoes_no_firebase(modelo_atual)
+        else:
+            _gravacao_pendente = True
+        _aquecido = True
+        metricas.definir('aquecimento_duracao_segundos', time.perf_counter() - inicio,
+                         'Duração do aquecimento (dados e modelos) do processo')
+
+
+def gravar_pendentes():
+    """
+    Grava as previsões que aquecer(gravar=False) deixou pendentes. Chamada no
+    worker (post_fork do gunicorn e, por garantia, a cada requisição).
+    """
+    global _gravacao_pendente
+    if not _gravacao_pendente:
+        return
+    with _trava_aquecimento:
+        if not _gravacao_pendente:
+            return
+        _gravacao_pendente = False
+    salvar_previsoes_no_firebase(modelo_atual)
 
-dados_graficos = preparar_dados_graficos(df)
 
 # ========================================================
-# Treinamento inicial de modelos
+# Modelo servido e respostas pré-calculadas
 # ========================================================
-print("Treinando modelo SVR (série até 31/12/2024)...")
-try:
-    cached_result = modelar_svr(serie)
-    print("Modelo (treino/teste) armazenado em cache.")
-except Exception as e:
-    print(f"Erro ao treinar modelo: {e}")
-    cached_result = None
+def previsoes_e_erros(serie, resultado):
+    """
+    Previsões arredondadas, com as datas seguintes ao fim da série, e as
+    métricas de erro do modelo, no formato das respostas da API.
+    """
+    yhat = resultado["previsao"]
+    inicio = pd.to_datetime(serie.index[-1]) + pd.Timedelta(days=1)
+    datas = pd.date_range(inicio, periods=len(yhat), freq='D').strftime("%Y-%m-%d")
+
+    previsoes = [{"data": d, "valor": int(round(v))} for d, v in zip(datas, yhat)]
+    erros = {
+        "MAE": round(resultado['mae'], 4),
+        "MSE": round(resultado['mse'], 4),
+        "RMSE": round(resultado['rmse'], 4),
+        "MAPE (%)": round(resultado['mape'], 2),
+    }
+    return previsoes, erros
+
+
+def _resposta_pronta(dados):
+    corpo = _serializar(dados)
+    return corpo, hashlib.sha256(corpo).hexdigest()[:32]
+
+
+def montar_modelo(serie, resultado, metadados, bairros):
+    """
+    Monta o dicionário do modelo servido, com as respostas de /api/previsao e
+    /api/avaliacao já serializadas (corpo e ETag), calculadas uma vez por modelo.
+    """
+    respostas = {}
+    if resultado is not None:
+        previsoes, erros = previsoes_e_erros(serie, resultado)
+        respostas['previsao'] = _resposta_pronta({
+            "previsao_proximo_dia": previsoes[0]['valor'],
+            "previsoes_proximos_6_dias": previsoes,
+        })
+        respostas['avaliacao'] = _resposta_pronta(erros)
+    return {'serie': serie, 'resultado': resultado, 'metadados': metadados, 'bairros': bairros,
+            'respostas': respostas}
+
+
+def _versao_publicada():
+    try:
+        return os.stat(ARQUIVO_MODELO_SERVIDO).st_mtime_ns
+    except OSError:
+        return None
+
+
+def publicar_modelo(modelo, cubo=None):
+    """
+    Grava o modelo servido (e o cubo dos gráficos, se informado) em disco para
+    que os outros workers passem a servi-los (ver sincronizar_modelo).
+    """
+    global _modelo_publicado
+    import joblib
+    os.makedirs(PASTA_CACHE, exist_ok=True)
+    temporario = f'{ARQUIVO_MODELO_SERVIDO}.{os.getpid()}.tmp'
+    publicado = {k: modelo[k] for k in ('serie', 'resultado', 'metadados', 'bairros')}
+    publicado['cubo'] = cubo
+    joblib.dump(publicado, temporario)
+    os.replace(temporario, ARQUIVO_MODELO_SERVIDO)
+    _modelo_publicado = _versao_publicada()
+
+
+def sincronizar_modelo():
+    """
+    Troca o modelo servido (e o cubo, se publicado junto) se outro processo
+    publicou um mais novo. Custa um os.stat por requisição quando nada mudou.
+    """
+    global modelo_atual, _modelo_publicado
+    versao = _versao_publicada()
+    if versao is None or versao == _modelo_publicado:
+        return
+    import joblib
+    with _trava_sincronizacao:
+        if versao == _modelo_publicado:
+            return
+        try:
+            publicado = joblib.load(ARQUIVO_MODELO_SERVIDO)
+            cubo = publicado.pop('cubo', None)
+            if cubo is not None:
+                atualizar_dados(cubo)
+            modelo_atual = montar_modelo(**publicado)
+            print('Modelo publicado por outro processo carregado')
+        except Exception as e:
+            print(f'Erro ao carregar o modelo publicado: {e}')
+        _modelo_publicado = versao
+
 
 # ========================================================
-# Função para salvar no Firebase
+# Persistência das previsões (SQLite local; Firestore se configurado)
 # ========================================================
-def salvar_previsoes_no_firebase():
-    if cached_result:
-        yhat = cached_result["previsao"]
-        start_date = pd.to_datetime(serie.index[-1]) + pd.Timedelta(days=1)
-        datas = [(start_date + pd.Timedelta(days=i)).strftime("%Y-%m-%d") for i in range(len(yhat))]
-
-        previsoes = [{"data": d, "valor": int(round(v))} for d, v in zip(datas, yhat)]
-        erros = {
-            "MAE": round(cached_result['mae'], 4),
-            "MSE": round(cached_result['mse'], 4),
-            "RMSE": round(cached_result['rmse'], 4),
-            "MAPE (%)": round(cached_result['mape'], 2),
+def documentos_previsao(modelo):
+    """
+    Documentos gravados a cada modelo: o resumo lido pelo frontend
+    (previsoes/ultimo_modelo), um documento por dia previsto, um por bairro e
+    as métricas do modelo no histórico (um documento por versão).
+    """
+    previsoes, erros = previsoes_e_erros(modelo['serie'], modelo['resultado'])
+
+    documentos = {("previsoes", "ultimo_modelo"): {"previsoes": previsoes, "erros": erros}}
+    for p in previsoes:
+        documentos[("previsoes_diarias", p["data"])] = p
+    for bairro, resultado in modelo['bairros'].items():
+        # '/' não é permitido no id de um documento do Firestore
+        documentos[("previsoes_bairros", bairro.replace('/', '-'))] = {
+            'bairro': bairro,
+            'previsoes': [{'data': d, 'valor': int(round(v))}
+                          for d, v in zip(resultado['datas'], resultado['previsao'])],
+            'MAE': round(resultado['mae'], 4),
+            'RMSE': round(resultado['rmse'], 4),
         }
+    metadados = modelo['metadados']
+    if metadados:
+        documentos[("historico_metricas", metadados['versao'])] = {
+            'versao': metadados['versao'], 'treinado_em': metadados['treinado_em'], **erros,
+        }
+    return documentos
 
-        db.collection("previsoes").document("ultimo_modelo").set({
-            "previsoes": previsoes,
-            "erros": erros
-        })
 
-        print("✅ Previsões e erros salvos no Firebase.")
-    else:
+def _salvar_previsoes(modelo):
+    # Medido aqui, dentro da tarefa, para que o tempo registrado seja o da
+    # montagem e gravação dos documentos e não o de colocá-los na fila
+    with metricas.cronometrar('salvar_previsoes_no_firebase'):
+        return gravar_documentos(documentos_previsao(modelo))
+
+
+def salvar_previsoes_no_firebase(modelo=None, esperar=False):
+    """
+    Envia as previsões do modelo à persistência em um único lote, só com os
+    documentos que mudaram. Com esperar=False a gravação roda em segundo plano.
+    """
+    modelo = modelo or modelo_atual
+    if not modelo['resultado']:
         print("⚠ Nenhum resultado para salvar no Firebase.")
+        return None
 
+    if esperar:
+        return _salvar_previsoes(modelo)
+    return executar_em_segundo_plano(_salvar_previsoes, modelo)
 
-# Salva automaticamente ao iniciar
-salvar_previsoes_no_firebase()
 
 # ========================================================
-# Funções auxiliares
+# Gráficos: cache por conjunto de filtros
 # ========================================================
-def convert_np(obj):
-    if isinstance(obj, np.integer): return int(obj)
-    if isinstance(obj, np.floating): return float(obj)
-    if isinstance(obj, np.ndarray): return obj.tolist()
-    if isinstance(obj, dict): return {k: convert_np(v) for k, v in obj.items()}
-    if isinstance(obj, list): return [convert_np(i) for i in obj]
-    return obj
+FILTROS_TEXTO = {'bairro': 'bairro', 'natureza': 'natureza', 'tipo': 'tipo'}
+TAMANHO_CACHE_GRAFICOS = 256
+
+
+def _serializar(dados):
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def normalizar_filtros(args):
+    """
+    Converte os parâmetros da query em uma tupla ordenada e hashable, para que
+    filtros equivalentes (ordem, caixa, espaços, repetições) usem a mesma
+    entrada do cache.
+
+    Parâmetros aceitos: ano_inicio, ano_fim, bairro, natureza, tipo
+    (os de texto podem se repetir ou vir separados por vírgula).
+    Lança ValueError se o ano não for inteiro.
+    """
+    filtros = []
+    for nome in ('ano_inicio', 'ano_fim'):
+        valor = args.get(nome, '').strip()
+        if valor:
+            filtros.append((nome, int(valor)))
+    for nome, chave in FILTROS_TEXTO.items():
+        valores = set()
+        for valor in args.getlist(nome):
+            valores.update(v.strip().upper() for v in valor.split(',') if v.strip())
+        if valores:
+            filtros.append((chave, tuple(sorted(valores))))
+    return tuple(filtros)
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_GRAFICOS)
+def graficos_filtrados(filtros, versao):
+    # JSON já serializado para o conjunto de filtros normalizado; a versão dos
+    # dados só entra na chave, para uma troca do cubo no meio do cálculo não
+    # deixar um gráfico antigo no cache
+    return _serializar(graficos_do_cubo(dados['cubo'], **dict(filtros)))
+
 
 # ========================================================
 # Rotas
 # ========================================================
-@app.route("/api/previsao", methods=["GET"])
+@api.before_app_request
+def _garantir_aquecimento():
+    g.inicio_requisicao = time.perf_counter()
+    if not _aquecido:
+        aquecer()
+    gravar_pendentes()
+    sincronizar_modelo()
+
+
+@api.after_app_request
+def _medir_requisicao(resposta):
+    inicio = g.get('inicio_requisicao')
+    if inicio is not None:
+        rota = request.url_rule.rule if request.url_rule is not None else 'desconhecida'
+        metricas.registrar_requisicao(rota, request.method, resposta.status_code, time.perf_counter() - inicio)
+    return resposta
+
+
+@api.route('/api/metrics')
+def metrics():
+    return Response(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _responder_pronta(pronta):
+    # Corpo já serializado; 304 se o cliente já tem esta versão (If-None-Match)
+    corpo, etag = pronta
+    resposta = Response(corpo, mimetype='application/json')
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = CACHE_CONTROL_MODELO
+    return resposta.make_conditional(request)
+
+
+@api.route("/api/previsao", methods=["GET"])
 def previsao():
-    if cached_result is None:
+    pronta = modelo_atual['respostas'].get('previsao')
+    if pronta is not None:
+        return _responder_pronta(pronta)
+
+    # Sem modelo em memória: serve a última previsão gravada localmente
+    salvo = ler_documento('previsoes', 'ultimo_modelo')
+    if salvo is None:
         return jsonify({'error': 'Modelo não disponível'}), 500
+    return jsonify({
+        "previsao_proximo_dia": salvo['previsoes'][0]['valor'],
+        "previsoes_proximos_6_dias": salvo['previsoes'],
+    })
+
 
-    yhat = cached_result["previsao"]
-    start_date = pd.to_datetime(serie.index[-1]) + pd.Timedelta(days=1)
-    datas = [(start_date + pd.Timedelta(days=i)).strftime("%Y-%m-%d") for i in range(len(yhat))]
+@api.route('/api/previsao/bairro/<nome>')
+def previsao_bairro(nome):
+    bairros = modelo_atual['bairros']
+    resultado = bairros.get(nome.strip().upper())
+    if resultado is None:
+        return jsonify({'error': f'Bairro não encontrado: {nome}'}), 404
 
     return jsonify({
-        "previsao_proximo_dia": int(round(yhat[0])),
-        "previsoes_proximos_6_dias": [
-            {"data": d, "valor": int(round(v))} for d, v in zip(datas, yhat)
-        ]
+        'bairro': nome.strip().upper(),
+        'previsoes': [
+            {'data': d, 'valor': int(round(v))} for d, v in zip(resultado['datas'], resultado['previsao'])
+        ],
+        'MAE': round(resultado['mae'], 4),
+        'RMSE': round(resultado['rmse'], 4),
     })
 
 
-@app.route('/api/avaliacao')
+@api.route('/api/avaliacao')
 def avaliacao():
-    if cached_result is None:
+    pronta = modelo_atual['respostas'].get('avaliacao')
+    if pronta is not None:
+        return _responder_pronta(pronta)
+
+    salvo = ler_documento('previsoes', 'ultimo_modelo')
+    if salvo is None:
         return jsonify({'error': 'Modelo não disponível'}), 500
-    return jsonify({
-        'MAE': round(cached_result['mae'], 4),
-        'MSE': round(cached_result['mse'], 4),
-        'RMSE': round(cached_result['rmse'], 4),
-        'MAPE (%)': round(cached_result['mape'], 2)
-    })
+    return jsonify(salvo['erros'])
 
 
-@app.route('/api/graficos')
+@api.route('/api/graficos')
 def graficos():
-    return jsonify(convert_np(dados_graficos))
+    try:
+        filtros = normalizar_filtros(request.args)
+    except ValueError:
+        return jsonify({'error': 'ano_inicio e ano_fim devem ser inteiros'}), 400
+
+    if filtros:
+        acertos = graficos_filtrados.cache_info().hits
+        corpo = graficos_filtrados(filtros, dados['versao'])
+        metricas.registrar_cache('graficos', graficos_filtrados.cache_info().hits > acertos)
+    else:
+        corpo = dados['graficos_padrao']
+        metricas.registrar_cache('graficos', True)
+    return Response(corpo, mimetype='application/json')
+
 
-@app.route('/api/retrain', methods=['POST'])
+# Coleções do armazenamento local expostas para consulta
+HISTORICOS = {'metricas': 'historico_metricas', 'previsoes': 'previsoes_diarias'}
+
+
+@api.route('/api/historico/<tipo>')
+def historico(tipo):
+    # Métricas de cada versão do modelo ou a última previsão feita para cada dia
+    if tipo not in HISTORICOS:
+        return jsonify({'error': f"Histórico desconhecido: {tipo} (use {', '.join(HISTORICOS)})"}), 404
+    return jsonify(listar_documentos(HISTORICOS[tipo]))
+
+
+def _treinar_em_processo_novo():
+    # Carga e treino do retreino, executados no processo criado por retreinar_modelo
+    from src.modelo_svr import modelar_svr, PARAMETROS_SVR
+    from src.previsao_bairros import prever_bairros
+
+    _, cubo = carregar_base()
+    serie = preparar_series(cubo)
+    resultado, metadados = obter_modelo('svr', serie, modelar_svr, PARAMETROS_SVR)
+    bairros = prever_bairros(cubo, inicio=INICIO_SERIE, fim=FIM_SERIE)
+    return cubo, serie, resultado, metadados, bairros
+
+
+def retreinar_modelo():
+    """
+    Recarrega os dados, treina (ou lê do registro) o SVR, troca o modelo servido
+    e atualiza o cubo e os gráficos. Roda em segundo plano, disparada por
+    /api/retrain.
+
+    O treino roda em um processo iniciado do zero (spawn), não no worker: um
+    worker é um fork do mestre e herda dele o estado do joblib e de threads,
+    o que pode travar o Parallel.
+    """
+    global modelo_atual
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+        cubo_novo, serie_nova, resultado, metadados, bairros = executor.submit(_treinar_em_processo_novo).result()
+
+    # Troca atômica: uma única atribuição de referência
+    # (as respostas pré-calculadas e seus ETags vêm junto com o modelo novo)
+    modelo_atual = montar_modelo(serie_nova, resultado, metadados, bairros)
+    atualizar_dados(cubo_novo)
+    publicar_modelo(modelo_atual, cubo_novo)
+    salvar_previsoes_no_firebase(modelo_atual)
+    return {'versao': metadados['versao'], 'treinado_em': metadados['treinado_em']}
+
+
+@api.route('/api/retrain', methods=['POST'])
 def retrain():
-    global cached_result
-    try:
-        df, _ = carregar_dados()
-        serie = df.groupby('data_unificada').size().asfreq('D')
-        cached_result = modelar_svr(serie)
-        salvar_previsoes_no_firebase()
-        return jsonify({'message': 'Modelo re-treinado com sucesso'})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Chamadas concorrentes recebem o id da tarefa que já está rodando
+    id_tarefa, nova = iniciar_tarefa('retrain', retreinar_modelo)
+    resposta = jsonify({
+        'id': id_tarefa,
+        'message': 'Retreino iniciado' if nova else 'Retreino já em andamento',
+        'status_url': f'/api/retrain/{id_tarefa}',
+    })
+    return resposta, 202, {'Location': f'/api/retrain/{id_tarefa}'}
+
+
+@api.route('/api/retrain/<id_tarefa>')
+def retrain_status(id_tarefa):
+    tarefa = status_tarefa(id_tarefa)
+    if tarefa is None:
+        return jsonify({'error': 'Tarefa não encontrada'}), 404
+    return jsonify(tarefa)
 
 
-@app.route('/')
+@api.route('/')
 def home():
     return '<h1>API Acidentes - Previsão e Dados</h1>'
 
 
+# ========================================================
+# Fábrica da aplicação
+# ========================================================
+def create_app(aquecer_agora=True, processo_mestre=False):
+    """
+    Cria a aplicação Flask.
+
+    Parâmetros:
+    - aquecer_agora: carrega dados e modelos antes de retornar; com False o
+      carregamento acontece na primeira requisição
+    - processo_mestre: o aquecimento roda no mestre do gunicorn (preload),
+      antes do fork: treina sem processos paralelos e deixa a gravação das
+      previsões para os workers
+    """
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(api)
+    if aquecer_agora:
+        if processo_mestre:
+            aquecer(n_jobs=1, gravar=False)
+        else:
+            aquecer()
+    return app
+
+
 # ========================================================
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -1,10 +1,54 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+import os
+import threading
 
-# Caminho para o arquivo de credenciais
-cred = credentials.Certificate("firebase-credenciais.json")
-firebase_admin.initialize_app(cred)
+# Caminho para o arquivo de credenciais (padrão: ao lado deste arquivo)
+ARQUIVO_CREDENCIAIS = os.environ.get('FIREBASE_CREDENCIAIS') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'firebase-credenciais.json')
 
-# Inicializa o Firestore
-db = firestore.client()
+_trava = threading.Lock()
+_db = None
+_pid = None
 
+
+def _apos_fork():
+    # A trava pode ter sido copiada fechada, se o pai estava inicializando o cliente
+    global _trava
+    _trava = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+
+def obter_db():
+    """
+    Inicializa o Firebase e o cliente do Firestore no primeiro uso: importar
+    este módulo não lê credenciais nem abre conexões.
+
+    Cada processo tem seu próprio app e cliente: um worker criado por fork não
+    reaproveita o canal gRPC aberto no processo pai.
+    """
+    global _db, _pid
+    with _trava:
+        if _db is None or _pid != os.getpid():
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+
+            nome = f'acidentes-{os.getpid()}'
+            try:
+                app = firebase_admin.get_app(nome)
+            except ValueError:
+                cred = credentials.Certificate(ARQUIVO_CREDENCIAIS)
+                app = firebase_admin.initialize_app(cred, name=nome)
+
+            # Inicializa o Firestore
+            _db = firestore.client(app)
+            _pid = os.getpid()
+        return _db
+
+
+def __getattr__(nome):
+    # Compatibilidade com `from firebase_config import db`
+    if nome == 'db':
+        return obter_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
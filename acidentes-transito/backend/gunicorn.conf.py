@@ -0,0 +1,47 @@
+# Configuração do gunicorn para produção: gunicorn -c gunicorn.conf.py wsgi:app
+import gc
+import multiprocessing
+import os
+import sys
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+# Workers (processos) e threads por worker. O estado carregado no aquecimento é
+# compartilhado entre os workers, então a memória cresce pouco com o número deles
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Carrega dados e modelos uma vez no mestre, antes do fork
+preload_app = True
+
+# O primeiro aquecimento sem modelo no registro treina o SVR; o retreino roda
+# em segundo plano e não ocupa a requisição
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+
+
+def _encerrar_pool_joblib():
+    # Um pool do joblib (loky) vivo no mestre é herdado quebrado pelos workers
+    # e o primeiro Parallel neles trava. O aquecimento no mestre usa n_jobs=1;
+    # isto só garante que nenhum pool criado por outro caminho chegue ao fork
+    if 'joblib' not in sys.modules:
+        return
+    from joblib.externals.loky import reusable_executor
+    executor = reusable_executor._executor
+    if executor is not None:
+        executor.shutdown(wait=True)
+        reusable_executor._executor = None
+
+
+def pre_fork(server, worker):
+    _encerrar_pool_joblib()
+    # Move os objetos do aquecimento para a geração permanente do coletor de
+    # lixo: as coletas nos workers não escrevem nesses objetos, e as páginas de
+    # memória continuam compartilhadas com o mestre
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # A thread de gravação e o cliente do Firestore nascem aqui, no worker:
+    # grava as previsões que o aquecimento no mestre deixou pendentes
+    import app
+    app.gravar_pendentes()
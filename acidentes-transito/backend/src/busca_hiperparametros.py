@@ -0,0 +1,316 @@
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.ar_model import AutoReg
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+from src.cache_dados import PASTA_CACHE
+from src.dividir_modelagem import dividir_modelagem
+from src.janelas import janelas_defasagem
+from src.modelo_svr import PARAMETROS_SVR, ajustar_passo, janelas_svr
+from src.registro_modelos import hash_serie
+import warnings
+warnings.filterwarnings('ignore')
+
+PASTA_BUSCA = os.path.join(PASTA_CACHE, 'busca')
+
+
+# ======================================
+#    AVALIADORES (FÁBRICAS DE MODELOS)
+# ======================================
+# Cada avaliador recebe o treino, o trecho avaliado e os hiperparâmetros e
+# devolve, para cada ponto do trecho avaliado, a previsão feita com os valores
+# reais anteriores (sem reestimar o modelo): um array com uma previsão por
+# ponto ou, para modelos de vários passos, uma coluna por passo do horizonte.
+
+def avaliar_svr(y_train, y_eval, C=1000.0, epsilon=0.001, gamma=3.2, dimension=6,
+                stepahead=PARAMETROS_SVR['stepahead'], stepahead_max=PARAMETROS_SVR['stepahead_max']):
+    # Mesmo desenho de modelar_svr: um SVR por passo, treinado nas janelas de
+    # janelas_svr (alvos até stepahead_max). A coluna h tem a previsão de cada
+    # ponto feita h + 1 dias antes, pelo SVR do passo h
+    parametros = {'dimension': dimension, 'stepahead_max': stepahead_max}
+    treino = y_train.to_numpy(dtype=float)
+    valores = np.concatenate([treino, y_eval.to_numpy(dtype=float)])
+
+    # Normalização com mínimo e máximo do treino
+    minimo, maximo = treino.min(), treino.max()
+    escala = (maximo - minimo) or 1.0
+    normalizados = (valores - minimo) / escala
+
+    Input, Targets = janelas_svr(normalizados[:len(treino)], parametros)
+    # Todas as janelas da série; a linha j termina na posição j + dimension - 1
+    janelas, _ = janelas_defasagem(normalizados, dimension, 1)
+    alvos = np.arange(len(treino), len(valores))
+
+    previsoes = np.empty((len(alvos), stepahead))
+    for h in range(stepahead):
+        modelo = ajustar_passo(Input, Targets[:, h], C, epsilon, gamma)
+        previsoes[:, h] = modelo.predict(janelas[alvos - h - dimension])
+    return previsoes * escala + minimo
+
+
+def avaliar_autoreg(y_train, y_eval, lags=20):
+    treino = y_train.to_numpy(dtype=float)
+    valores = np.concatenate([treino, y_eval.to_numpy(dtype=float)])
+    ajustado = AutoReg(treino, lags=lags).fit()
+    # Mesmos parâmetros aplicados à série completa (previsão um passo à frente)
+    return AutoReg(valores, lags=lags).predict(ajustado.params, start=len(treino), end=len(valores) - 1)
+
+
+def avaliar_sarima(y_train, y_eval, order=(1, 0, 1), seasonal_order=(0, 0, 0, 0)):
+    treino = y_train.to_numpy(dtype=float)
+    ajustado = SARIMAX(treino, order=tuple(order), seasonal_order=tuple(seasonal_order)).fit(disp=False)
+    # append sem reestimar: previsões um passo à frente no trecho avaliado
+    estendido = ajustado.append(y_eval.to_numpy(dtype=float))
+    return estendido.predict(start=len(treino), end=len(treino) + len(y_eval) - 1)
+
+
+ESPACO_SVR = {
+    'C': [10.0, 100.0, 1000.0],
+    'epsilon': [0.001, 0.01, 0.1],
+    'gamma': [0.1, 1.0, 3.2],
+    'dimension': [6, 7, 14],
+}
+ESPACO_AUTOREG = {
+    'lags': list(range(5, 61, 5)),
+}
+ESPACO_SARIMA = {
+    'order': [(p, d, q) for p in range(3) for d in range(2) for q in range(3)],
+    'seasonal_order': [(0, 0, 0, 0), (1, 0, 0, 7), (0, 0, 1, 7), (1, 0, 1, 7)],
+}
+
+# nome -> (avaliador, espaço padrão)
+FABRICAS = {
+    'svr': (avaliar_svr, ESPACO_SVR),
+    'autoreg': (avaliar_autoreg, ESPACO_AUTOREG),
+    'sarima': (avaliar_sarima, ESPACO_SARIMA),
+}
+
+
+# ======================================
+#    GERAÇÃO DE CANDIDATOS
+# ======================================
+def candidatos_grade(espaco):
+    """
+    Todas as combinações de um espaço {parâmetro: lista de valores}.
+    """
+    nomes = list(espaco)
+    for valores in itertools.product(*(espaco[n] for n in nomes)):
+        yield dict(zip(nomes, valores))
+
+
+def candidatos_aleatorios(espaco, n_amostras, semente=42):
+    """
+    Amostras aleatórias de um espaço. Cada parâmetro pode ser uma lista
+    (sorteio de um item), uma tupla (mínimo, máximo) (uniforme; inteira se os
+    dois limites forem int) ou uma função que recebe o gerador e devolve um valor.
+    Combinações repetidas são descartadas.
+    """
+    rng = np.random.default_rng(semente)
+    vistos = set()
+    tentativas = 0
+    while len(vistos) < n_amostras and tentativas < n_amostras * 20:
+        tentativas += 1
+        params = {}
+        for nome, dominio in espaco.items():
+            if callable(dominio):
+                valor = dominio(rng)
+            elif isinstance(dominio, tuple) and len(dominio) == 2:
+                baixo, alto = dominio
+                if isinstance(baixo, int) and isinstance(alto, int):
+                    valor = int(rng.integers(baixo, alto + 1))
+                else:
+                    valor = float(rng.uniform(baixo, alto))
+            else:
+                valor = dominio[int(rng.integers(len(dominio)))]
+            params[nome] = valor.item() if isinstance(valor, np.generic) else valor
+        chave = _chave(params)
+        if chave not in vistos:
+            vistos.add(chave)
+            yield params
+
+
+# ======================================
+#    AVALIAÇÃO E CACHE
+# ======================================
+def _chave(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _metricas(reais, previstos):
+    # Com uma coluna por passo do horizonte, o erro é a média de todos os passos
+    reais = np.asarray(reais, dtype=float)
+    previstos = np.asarray(previstos, dtype=float)
+    if previstos.ndim == 2:
+        reais = np.repeat(reais[:, None], previstos.shape[1], axis=1)
+    erros = reais - previstos
+    mascara = reais != 0
+    return {
+        'mae': float(np.mean(np.abs(erros))),
+        'rmse': float(np.sqrt(np.mean(erros ** 2))),
+        'mape': float(np.mean(np.abs(erros[mascara] / reais[mascara])) * 100) if mascara.any() else None,
+    }
+
+
+def _avaliar(avaliador, y_train, y_eval, params):
+    # Executado nos processos do pool; erros viram resultado para não parar a busca
+    inicio = time.perf_counter()
+    try:
+        metricas = _metricas(y_eval, avaliador(y_train, y_eval, **params))
+        erro = None
+    except Exception as e:
+        metricas, erro = {}, str(e)
+    return {'params': params, **metricas, 'erro': erro, 'tempo_s': round(time.perf_counter() - inicio, 3)}
+
+
+def _arquivo_cache(nome, serie, pasta):
+    return os.path.join(pasta, f'{nome}-{hash_serie(serie)[:16]}.jsonl')
+
+
+def _ler_cache(caminho):
+    avaliados = {}
+    if os.path.exists(caminho):
+        with open(caminho, encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    resultado = json.loads(linha)
+                except ValueError:
+                    continue  # linha incompleta de uma execução interrompida
+                avaliados[_chave(resultado['params'])] = resultado
+    return avaliados
+
+
+def buscar_hiperparametros(serie, nome, espaco=None, metodo='grade', n_amostras=20, metrica='mae',
+                           n_workers=None, paciencia=None, tempo_max=None, semente=42,
+                           usar_cache=True, pasta=PASTA_BUSCA):
+    """
+    Busca de hiperparâmetros em paralelo com a divisão 60/20/20 de
+    dividir_modelagem: cada candidato é ajustado no treino e avaliado na
+    validação; o melhor é reavaliado no teste, ajustado em treino + validação.
+
+    Parâmetros:
+    - serie: Series diária
+    - nome: fábrica registrada em FABRICAS ('svr', 'autoreg', 'sarima') ou um
+      avaliador próprio: função avaliador(y_train, y_eval, **params), definida
+      no nível de um módulo para poder ir aos processos do pool; nesse caso o
+      espaco é obrigatório
+    - espaco: {parâmetro: valores}; padrão: espaço da fábrica
+    - metodo: 'grade' (todas as combinações) ou 'aleatoria' (n_amostras sorteadas)
+    - metrica: 'mae', 'rmse' ou 'mape' na validação (menor é melhor)
+    - n_workers: processos do pool (None ou 1 = em série)
+    - paciencia: para depois de N avaliações seguidas sem melhora (None = não para)
+    - tempo_max: segundos até parar de enviar candidatos (None = sem limite)
+    - usar_cache: reaproveita avaliações já feitas para a mesma série e fábrica,
+      gravadas em backend/cache/busca
+
+    Retorna:
+    - dicionário com melhores_params, melhor_<metrica>_val, as métricas de teste
+      (mae_test, rmse_test, mape_test), interrompida e resultados
+      (DataFrame com todos os candidatos avaliados)
+    """
+    if callable(nome):
+        if not espaco:
+            raise ValueError('Um avaliador próprio precisa do seu espaco de parâmetros.')
+        avaliador, espaco_padrao = nome, None
+        nome = getattr(avaliador, '__name__', 'avaliador')
+    else:
+        avaliador, espaco_padrao = FABRICAS[nome]
+    espaco = espaco or espaco_padrao
+    if metodo == 'grade':
+        candidatos = candidatos_grade(espaco)
+    elif metodo == 'aleatoria':
+        candidatos = candidatos_aleatorios(espaco, n_amostras, semente)
+    else:
+        raise ValueError(f"metodo deve ser 'grade' ou 'aleatoria', recebido: {metodo!r}")
+
+    serie = serie.fillna(0)
+    y_train, y_val, y_test = dividir_modelagem(serie)
+
+    caminho = _arquivo_cache(nome, serie, pasta)
+    avaliados = _ler_cache(caminho) if usar_cache else {}
+    if usar_cache:
+        os.makedirs(pasta, exist_ok=True)
+
+    resultados = []
+    melhor = np.inf
+    sem_melhora = 0
+    interrompida = False
+    inicio = time.perf_counter()
+
+    def _registrar(resultado, novo):
+        nonlocal melhor, sem_melhora
+        resultados.append(resultado)
+        if novo and usar_cache:
+            with open(caminho, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(resultado, default=str) + '\n')
+        valor = resultado.get(metrica)
+        if valor is not None and valor < melhor:
+            melhor, sem_melhora = valor, 0
+        else:
+            sem_melhora += 1
+
+    def _parar():
+        if not resultados:
+            return False
+        if paciencia is not None and sem_melhora >= paciencia:
+            return True
+        return tempo_max is not None and time.perf_counter() - inicio >= tempo_max
+
+    # Candidatos já avaliados saem do cache; os demais vão para o pool. O JSON
+    # devolve tuplas como listas: o resultado do cache usa os params do
+    # candidato, com os mesmos tipos de uma avaliação nova
+    pendentes = []
+    for params in candidatos:
+        if _chave(params) in avaliados:
+            _registrar({**avaliados[_chave(params)], 'params': params}, novo=False)
+        else:
+            pendentes.append(params)
+    print(f'Busca {nome}: {len(resultados)} candidatos do cache, {len(pendentes)} a avaliar')
+
+    if not n_workers or n_workers <= 1:
+        for params in pendentes:
+            if _parar():
+                interrompida = True
+                break
+            _registrar(_avaliar(avaliador, y_train, y_val, params), novo=True)
+    elif pendentes:
+        # No máximo n_workers candidatos em andamento, para que a parada
+        # antecipada não desperdice o restante da fila
+        fila = iter(pendentes)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            em_andamento = set()
+            for params in itertools.islice(fila, n_workers):
+                em_andamento.add(executor.submit(_avaliar, avaliador, y_train, y_val, params))
+            while em_andamento:
+                prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    _registrar(futuro.result(), novo=True)
+                if _parar():
+                    interrompida = interrompida or next(fila, None) is not None
+                    continue
+                for params in itertools.islice(fila, len(prontos)):
+                    em_andamento.add(executor.submit(_avaliar, avaliador, y_train, y_val, params))
+
+    tabela = pd.DataFrame(resultados)
+    validos = tabela[tabela[metrica].notna()] if metrica in tabela else tabela.iloc[0:0]
+    if validos.empty:
+        raise ValueError(f'Nenhum candidato de {nome} pôde ser avaliado.')
+    validos = validos.sort_values(metrica, kind='mergesort')
+    melhores_params = validos.iloc[0]['params']
+    print(f'Melhor {nome}: {melhores_params} ({metrica} validação = {validos.iloc[0][metrica]:.4f})')
+
+    # Teste: ajuste com treino + validação, como no uso final do modelo
+    teste = _metricas(y_test, avaliador(pd.concat([y_train, y_val]), y_test, **melhores_params))
+
+    return {
+        'melhores_params': melhores_params,
+        f'melhor_{metrica}_val': float(validos.iloc[0][metrica]),
+        'mae_test': teste['mae'],
+        'rmse_test': teste['rmse'],
+        'mape_test': teste['mape'],
+        'interrompida': interrompida,
+        'resultados': tabela,
+    }
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from src.esquema import padronizar_texto
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # backend/src
+PASTA_CACHE = os.path.abspath(os.path.join(BASE_DIR, '..', 'cache'))
+PASTA_PARTICOES = os.path.join(PASTA_CACHE, 'particoes')
+ARQUIVO_MANIFESTO = os.path.join(PASTA_CACHE, 'manifesto.json')
+
+# Módulos cujo código altera o DataFrame tratado: qualquer mudança neles invalida o snapshot
+MODULOS_TRATAMENTO = ['carga_dados.py', 'utils.py', 'datas.py', 'turnos.py', 'esquema.py', 'cubo.py']
+
+
+def _tem_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@lru_cache(maxsize=None)
+def versao_tratamento():
+    """
+    Retorna um hash do código-fonte dos módulos de tratamento.
+    """
+    h = hashlib.sha256()
+    for nome in MODULOS_TRATAMENTO:
+        with open(os.path.join(BASE_DIR, nome), 'rb') as f:
+            h.update(nome.encode('utf-8'))
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def chave_snapshot(arquivos_csv):
+    """
+    Gera a chave do snapshot a partir dos CSVs de entrada.
+
+    Parâmetros:
+    - arquivos_csv: lista de caminhos dos CSVs lidos por carregar_dados
+
+    Retorna:
+    - string hexadecimal que muda sempre que algum CSV (caminho, mtime ou tamanho)
+      ou o código de tratamento mudar
+    """
+    h = hashlib.sha256()
+    h.update(versao_tratamento().encode('utf-8'))
+    for arquivo in sorted(os.path.abspath(a) for a in arquivos_csv):
+        st = os.stat(arquivo)
+        h.update(f'{arquivo}|{st.st_mtime_ns}|{st.st_size}\n'.encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+def _assinatura(arquivo):
+    st = os.stat(arquivo)
+    return {'mtime_ns': st.st_mtime_ns, 'tamanho': st.st_size, 'versao': versao_tratamento()}
+
+
+def _caminhos(chave, pasta, sufixo=''):
+    base = os.path.join(pasta, f'snapshot-{chave}{sufixo}')
+    return base + '.parquet', base + '.pkl', base + '.json'
+
+
+def _preparar_para_parquet(df):
+    # Colunas object com tipos misturados não cabem em uma coluna Arrow. O
+    # tratamento já as padroniza; aqui a mesma regra vale para qualquer df
+    # gravado, para que nada mude de tipo entre a gravação e a leitura.
+    return padronizar_texto(df.copy())
+
+
+def _gravar_df(df, base):
+    # Grava de forma atômica e retorna o caminho final
+    if _tem_pyarrow():
+        destino = base + '.parquet'
+        tmp = destino + '.tmp'
+        _preparar_para_parquet(df).to_parquet(tmp, index=False)
+    else:
+        destino = base + '.pkl'
+        tmp = destino + '.tmp'
+        df.to_pickle(tmp)
+    os.replace(tmp, destino)
+    return destino
+
+
+def _ler_df(caminho):
+    if caminho.endswith('.parquet'):
+        df = pd.read_parquet(caminho)
+        # O Parquet devolve os nulos de texto como None; o tratamento usa NaN
+        texto = df.select_dtypes(include='object').columns
+        if len(texto):
+            df[texto] = df[texto].where(df[texto].notna(), np.nan)
+        return df
+    return pd.read_pickle(caminho)
+
+
+def _ler_snapshot(chave, pasta, sufixo=''):
+    parquet, pkl, _ = _caminhos(chave, pasta, sufixo)
+    if os.path.exists(parquet) and _tem_pyarrow():
+        return _ler_df(parquet)
+    if os.path.exists(pkl):
+        return _ler_df(pkl)
+    return None
+
+
+def carregar_snapshot(chave, pasta=PASTA_CACHE):
+    """
+    Lê o snapshot (DataFrame tratado + cubo diário) salvo para a chave.
+
+    Retorna:
+    - (df, cubo) ou None se não houver snapshot válido
+    """
+    meta = _caminhos(chave, pasta)[2]
+    if not os.path.exists(meta):
+        return None
+    try:
+        df = _ler_snapshot(chave, pasta)
+        cubo = _ler_snapshot(chave, pasta, '-cubo')
+    except Exception as e:
+        print(f'Erro ao ler snapshot {chave}: {e}')
+        return None
+    if df is None or cubo is None:
+        return None
+    return df, cubo
+
+
+def salvar_snapshot(chave, df, cubo, pasta=PASTA_CACHE):
+    """
+    Grava o snapshot (DataFrame e cubo) em Parquet, ou pickle se pyarrow não
+    estiver instalado, e remove os snapshots antigos da pasta.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    meta = _caminhos(chave, pasta)[2]
+
+    destino = _gravar_df(df, os.path.join(pasta, f'snapshot-{chave}'))
+    destino_cubo = _gravar_df(cubo, os.path.join(pasta, f'snapshot-{chave}-cubo'))
+
+    # O .json é gravado por último: sem ele o snapshot é considerado incompleto
+    tmp = meta + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'chave': chave, 'linhas': int(df.shape[0]), 'linhas_cubo': int(cubo.shape[0])}, f)
+    os.replace(tmp, meta)
+
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        if nome.startswith('snapshot-') and caminho not in (destino, destino_cubo, meta):
+            os.remove(caminho)
+
+    print(f'Snapshot salvo: {destino}')
+
+
+# ======================================
+#    PARTIÇÕES POR ARQUIVO (CARGA INCREMENTAL)
+# ======================================
+def carregar_manifesto(caminho=ARQUIVO_MANIFESTO):
+    """
+    Lê o manifesto de ingestão: para cada CSV, a assinatura (mtime, tamanho,
+    versão do tratamento) com que foi processado, a partição gerada e a ordem
+    original das colunas.
+    """
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f'Manifesto inválido, reprocessando todos os arquivos: {e}')
+        return {}
+
+
+def salvar_manifesto(manifesto, arquivos_csv, caminho=ARQUIVO_MANIFESTO, pasta=PASTA_PARTICOES):
+    """
+    Grava o manifesto mantendo só os CSVs ainda presentes e apaga as partições
+    que deixaram de ser referenciadas.
+    """
+    presentes = {os.path.abspath(a) for a in arquivos_csv}
+    manifesto = {a: info for a, info in manifesto.items() if a in presentes}
+
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = caminho + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, caminho)
+
+    if os.path.isdir(pasta):
+        usadas = {info['particao'] for info in manifesto.values()}
+        for nome in os.listdir(pasta):
+            if nome not in usadas:
+                os.remove(os.path.join(pasta, nome))
+
+
+def carregar_particao(arquivo, manifesto, pasta=PASTA_PARTICOES):
+    """
+    Retorna (df, colunas) da partição já tratada do CSV, ou None se o arquivo
+    é novo, mudou desde a última carga ou o tratamento mudou.
+    """
+    info = manifesto.get(os.path.abspath(arquivo))
+    if info is None or info['assinatura'] != _assinatura(arquivo):
+        return None
+    caminho = os.path.join(pasta, info['particao'])
+    if not os.path.exists(caminho) or (caminho.endswith('.parquet') and not _tem_pyarrow()):
+        return None
+    try:
+        return _ler_df(caminho), info['colunas']
+    except Exception as e:
+        print(f'Erro ao ler partição de {arquivo}: {e}')
+        return None
+
+
+def salvar_particao(arquivo, df, colunas, manifesto, pasta=PASTA_PARTICOES):
+    """
+    Grava a partição tratada de um CSV e registra no manifesto (em memória;
+    o manifesto é persistido por salvar_manifesto).
+    """
+    os.makedirs(pasta, exist_ok=True)
+    arquivo = os.path.abspath(arquivo)
+    assinatura = _assinatura(arquivo)
+    nome = hashlib.sha256(json.dumps([arquivo, assinatura]).encode('utf-8')).hexdigest()[:32]
+    destino = _gravar_df(df, os.path.join(pasta, nome))
+    manifesto[arquivo] = {
+        'assinatura': assinatura,
+        'particao': os.path.basename(destino),
+        'colunas': list(colunas),
+        'linhas': int(df.shape[0]),
+    }
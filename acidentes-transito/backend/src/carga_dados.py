@@ -1,73 +1,275 @@
+import numpy as np
 import pandas as pd
 import os
+from concurrent.futures import ProcessPoolExecutor
 from src.utils import tratar_dados
+from src.datas import remover_bom, COLUNAS_DATA
+from src.esquema import compactar, memoria_por_linha, COLUNAS_CONTAGEM
+from src.cubo import construir_cubo, combinar_cubos, graficos_do_cubo
+from src.metricas import medir, cronometrar, registrar_linhas, registrar_cache
+from src.cache_dados import (
+    chave_snapshot, carregar_snapshot, salvar_snapshot,
+    carregar_manifesto, salvar_manifesto, carregar_particao, salvar_particao,
+)
 
-def carregar_dados():
-    dados = {}
+# Caminho absoluto para a pasta csvs
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # backend/src
+PASTA_CSVS = os.path.abspath(os.path.join(BASE_DIR, '..', 'csvs'))
 
-    # Caminho absoluto para a pasta csvs
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # backend/src
-    pasta = os.path.join(base_dir, '..', 'csvs')
-    pasta = os.path.abspath(pasta)
+# Modo em blocos: número de linhas lidas de cada vez (variável de ambiente
+# TAMANHO_BLOCO; vazio ou 0 = arquivos inteiros)
+TAMANHO_BLOCO = int(os.environ.get('TAMANHO_BLOCO') or 0) or None
 
-    print(f"Lendo CSVs da pasta: {pasta}")
+# Colunas que o cubo usa: só elas são lidas no modo em blocos
+COLUNAS_CUBO = set(COLUNAS_DATA) | {'hora', 'bairro', 'natureza_acidente', 'tipo'} | set(COLUNAS_CONTAGEM)
+DIMENSOES_TEXTO = ['bairro', 'natureza_acidente', 'tipo']
 
-    # Lista de arquivos CSV
-    arquivos_csv = [os.path.join(pasta, f) for f in os.listdir(pasta) if f.endswith('.csv')]
 
-    dfs = []
+def listar_csvs(pasta=PASTA_CSVS):
+    # Ordem fixa por nome para que a concatenação seja determinística
+    return sorted(os.path.join(pasta, f) for f in os.listdir(pasta) if f.endswith('.csv'))
+
+
+@medir('ler_arquivo')
+def ler_arquivo(arquivo):
+    """
+    Lê e trata um único CSV anual.
+
+    Retorna:
+    - (df tratado, lista com as colunas originais do arquivo)
+    """
+    df = pd.read_csv(arquivo, encoding='latin1', sep=';')
+    df.columns = remover_bom(df.columns)
+    colunas = df.columns.tolist()
+    return tratar_dados(df), colunas
+
+
+def _ler_arquivos(arquivos, n_workers=None):
+    """
+    Lê e trata os arquivos, em série ou em um pool de processos.
+
+    Gera (arquivo, (df, colunas)) na mesma ordem de `arquivos`; se a leitura
+    de um arquivo falhar, o segundo item é a exceção. LookupError (recurso do
+    NLTK não instalado) não é um problema do arquivo e interrompe a carga:
+    ignorá-la descartaria todos os CSVs com descrição.
+    """
+    if not n_workers or n_workers <= 1 or len(arquivos) <= 1:
+        for arquivo in arquivos:
+            try:
+                yield arquivo, ler_arquivo(arquivo)
+            except LookupError:
+                raise
+            except Exception as e:
+                yield arquivo, e
+        return
+
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(arquivos))) as executor:
+        futuros = [executor.submit(ler_arquivo, arquivo) for arquivo in arquivos]
+        for arquivo, futuro in zip(arquivos, futuros):
+            try:
+                yield arquivo, futuro.result()
+            except LookupError:
+                raise
+            except Exception as e:
+                yield arquivo, e
+
+
+def _coluna_do_cubo(nome):
+    return remover_bom([nome])[0] in COLUNAS_CUBO
+
+
+def ler_blocos(arquivo, tamanho_bloco):
+    """
+    Lê e trata um CSV em blocos de `tamanho_bloco` linhas, só com as colunas
+    usadas pelo cubo (a descrição e os demais campos de texto não são lidos).
+
+    Gera um DataFrame tratado por bloco; dimensões ausentes no arquivo vêm nulas.
+    """
+    with pd.read_csv(arquivo, encoding='latin1', sep=';', chunksize=tamanho_bloco,
+                     usecols=_coluna_do_cubo) as leitor:
+        for bloco in leitor:
+            bloco.columns = remover_bom(bloco.columns)
+            bloco = tratar_dados(bloco)
+            for coluna in DIMENSOES_TEXTO:
+                if coluna not in bloco.columns:
+                    bloco[coluna] = pd.Series(np.nan, index=bloco.index, dtype=object)
+            yield bloco
+
+
+class _Acumulador:
+    # Soma cubos parciais. Os pendentes só são combinados quando passam do
+    # tamanho do acumulado, então cada linha é reagregada poucas vezes
+    # (custo amortizado linear) e a memória fica limitada a ~2x o cubo.
+    def __init__(self):
+        self.cubo = None
+        self.pendentes = []
+        self.linhas_pendentes = 0
+
+    def adicionar(self, parcial):
+        self.pendentes.append(parcial)
+        self.linhas_pendentes += len(parcial)
+        if self.cubo is None or self.linhas_pendentes >= len(self.cubo):
+            self.cubo = combinar_cubos([self.cubo] + self.pendentes)
+            self.pendentes, self.linhas_pendentes = [], 0
+
+    def total(self):
+        if self.pendentes:
+            self.cubo = combinar_cubos([self.cubo] + self.pendentes)
+            self.pendentes, self.linhas_pendentes = [], 0
+        return self.cubo
+
+
+def carregar_cubo_em_blocos(arquivos_csv, tamanho_bloco):
+    """
+    Monta o cubo diário lendo os CSVs em blocos: cada bloco é tratado,
+    agregado em um cubo parcial e descartado, então o pico de memória depende
+    do tamanho do bloco e do cubo, não do histórico total.
+
+    Um arquivo com erro de leitura é ignorado por inteiro, como em carregar_base.
+
+    Retorna:
+    - (cubo, número de linhas lidas)
+    """
+    total = _Acumulador()
+    linhas = 0
     for arquivo in arquivos_csv:
+        do_arquivo = _Acumulador()
+        linhas_arquivo = 0
         try:
-            df_temp = pd.read_csv(arquivo, encoding='latin1', sep=';')
-            dfs.append(df_temp)
-            print(f'Lido: {arquivo}')
+            for bloco in ler_blocos(arquivo, tamanho_bloco):
+                linhas_arquivo += len(bloco)
+                do_arquivo.adicionar(construir_cubo(bloco))
+        except LookupError:
+            raise
         except Exception as e:
             print(f'Erro ao ler {arquivo}: {e}')
+            continue
+        if do_arquivo.cubo is not None:
+            total.adicionar(do_arquivo.total())
+        linhas += linhas_arquivo
+        print(f'Lido em blocos: {arquivo} ({linhas_arquivo} linhas)')
+    return total.total(), linhas
+
+
+def _ordenar_colunas(df, colunas_arquivos):
+    # Colunas originais na ordem em que aparecem nos arquivos, depois as derivadas
+    ordem = []
+    for colunas in colunas_arquivos + [df.columns]:
+        for col in colunas:
+            if col not in ordem:
+                ordem.append(col)
+    return df[ordem]
 
-    # Junta todos os dataframes válidos
-    df = pd.concat(dfs, ignore_index=True)
-    print(f'\nTotal de arquivos lidos com sucesso: {len(dfs)}')
-    print(f'Total de registros: {df.shape[0]}')
 
-    # TRATA O DATAFRAME
-    df = tratar_dados(df)
+@medir('carregar_dados')
+def carregar_base(usar_cache=True, n_workers=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê e trata todos os CSVs da pasta csvs e agrega o cubo diário usado
+    pelos gráficos e pela série temporal.
 
-    # ======================================
-    #    GERAÇÃO DOS DADOS PARA OS GRÁFICOS
-    # ======================================
-    acidentes_ano = df['ano'].value_counts().sort_index()
-    dados['acidentes_ano'] = {'anos': acidentes_ano.index.tolist(), 'valores': acidentes_ano.values.tolist()}
+    Parâmetros:
+    - usar_cache: reaproveita snapshot e partições salvos em backend/cache
+    - n_workers: número de processos para ler/tratar os arquivos pendentes
+      (None ou 1 = em série)
+    - tamanho_bloco: se definido, lê os CSVs em blocos com esse número de
+      linhas e monta só o cubo (carregar_cubo_em_blocos); o DataFrame completo
+      não é montado e o snapshot e as partições não são usados
+
+    Retorna:
+    - df, cubo (df é None no modo em blocos)
+    """
+    pasta = PASTA_CSVS
+
+    print(f"Lendo CSVs da pasta: {pasta}")
+
+    # Lista de arquivos CSV
+    arquivos_csv = listar_csvs(pasta)
 
-    acidentes_dia = df['dia_nome'].value_counts().reindex(['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']).fillna(0)
-    dados['acidentes_dia'] = {'dias': acidentes_dia.index.tolist(), 'valores': acidentes_dia.values.tolist()}
+    if tamanho_bloco:
+        with cronometrar('construir_cubo'):
+            cubo, linhas = carregar_cubo_em_blocos(arquivos_csv, tamanho_bloco)
+        print(f'Total de registros: {linhas}')
+        print(f'Linhas do cubo: {cubo.shape[0]}')
+        registrar_linhas('carregar_dados', linhas)
+        registrar_linhas('construir_cubo', cubo.shape[0])
+        return None, cubo
 
-    top_bairros = df['bairro'].value_counts().head(10)
-    dados['top_bairros'] = {'bairros': top_bairros.index.tolist(), 'valores': top_bairros.values.tolist()}
+    # Snapshot do DataFrame já tratado, invalidado quando algum CSV ou o tratamento muda
+    if usar_cache:
+        chave = chave_snapshot(arquivos_csv)
+        snapshot = carregar_snapshot(chave)
+        registrar_cache('snapshot', snapshot is not None)
+        if snapshot is not None:
+            print(f'Snapshot {chave} carregado do cache')
+            registrar_linhas('carregar_dados', snapshot[0].shape[0])
+            registrar_linhas('construir_cubo', snapshot[1].shape[0])
+            return snapshot
+
+    # Cada arquivo é tratado isoladamente; só os novos ou alterados são reprocessados
+    manifesto = carregar_manifesto() if usar_cache else {}
+
+    particoes = {}
+    if usar_cache:
+        for arquivo in arquivos_csv:
+            particao = carregar_particao(arquivo, manifesto)
+            registrar_cache('particoes', particao is not None)
+            if particao is not None:
+                particoes[arquivo] = particao
+                print(f'Partição em cache: {arquivo}')
+
+    pendentes = [a for a in arquivos_csv if a not in particoes]
+    falhas = []
+    for arquivo, resultado in _ler_arquivos(pendentes, n_workers):
+        if isinstance(resultado, Exception):
+            print(f'Erro ao ler {arquivo}: {resultado}')
+            falhas.append(arquivo)
+            continue
+        if usar_cache:
+            salvar_particao(arquivo, resultado[0], resultado[1], manifesto)
+        particoes[arquivo] = resultado
+        print(f'Lido: {arquivo}')
+
+    # Concatena sempre na ordem dos arquivos, independente de onde cada um foi processado
+    dfs = [particoes[a][0] for a in arquivos_csv if a in particoes]
+    colunas_arquivos = [particoes[a][1] for a in arquivos_csv if a in particoes]
+
+    if usar_cache:
+        salvar_manifesto(manifesto, arquivos_csv)
+
+    # Junta todos os dataframes válidos
+    df = pd.concat(dfs, ignore_index=True)
+    df = _ordenar_colunas(df, colunas_arquivos)
+    print(f'\nTotal de arquivos lidos com sucesso: {len(dfs)}')
+    print(f'Total de registros: {df.shape[0]}')
 
-    natureza = df['natureza_acidente'].value_counts()
-    dados['natureza'] = {'naturezas': natureza.index.tolist(), 'valores': natureza.values.tolist()}
+    # Representação compacta: contagens como inteiros pequenos, dimensões como category
+    df = compactar(df)
+    total, por_linha = memoria_por_linha(df)
+    print(f'Memória do DataFrame: {total / 1e6:.1f} MB ({por_linha:.0f} bytes/linha)')
 
-    tipo = df['tipo'].value_counts().head(20)
-    dados['tipo'] = {'tipos': tipo.index.tolist(), 'valores': tipo.values.tolist()}
+    # Cubo diário pré-agregado: os gráficos e a série saem dele, não do df
+    with cronometrar('construir_cubo'):
+        cubo = construir_cubo(df)
+    print(f'Linhas do cubo: {cubo.shape[0]}')
+    registrar_linhas('carregar_dados', df.shape[0])
+    registrar_linhas('construir_cubo', cubo.shape[0])
 
-    tabela = pd.crosstab(df['dia_nome'], df['turno']).reindex(
-        index=['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom'],
-        columns=['Madrugada', 'Manhã', 'Tarde', 'Noite', 'Indefinido'],
-        fill_value=0
-    )
-    dados['heatmap_turno'] = tabela.values.tolist()
-    dados['heatmap_turno_dias'] = tabela.index.tolist()
-    dados['heatmap_turno_turnos'] = tabela.columns.tolist()
+    # A chave do snapshot cobre todos os CSVs: com algum arquivo faltando, os
+    # dados parciais não podem ser servidos como se fossem a base completa
+    if usar_cache and falhas:
+        print(f'Snapshot não salvo: {len(falhas)} arquivo(s) com erro de leitura')
+    elif usar_cache:
+        salvar_snapshot(chave, df, cubo)
 
-    tipo_veiculos = ['auto', 'moto', 'ciclom', 'ciclista', 'pedestre', 'onibus', 'caminhao', 'viatura', 'outros']
-    soma_veiculos = df[tipo_veiculos].sum().astype(int)
-    dados['veiculos'] = {'tipos': soma_veiculos.index.tolist(), 'valores': soma_veiculos.values.tolist()}
+    return df, cubo
 
-    tipo_vitima = ['vitimas', 'vitimasfatais']
-    soma_vitimas = df[tipo_vitima].sum().astype(int)
-    dados['vitimas'] = {'tipos': soma_vitimas.index.tolist(), 'valores': soma_vitimas.values.tolist()}
 
-    hist = df['hora_limpa'].value_counts().sort_index()
-    dados['hora_dia'] = {'horas': hist.index.tolist(), 'valores': hist.values.tolist()}
+def carregar_dados(usar_cache=True, n_workers=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Igual a carregar_base, mas devolve os dados de todos os gráficos no lugar do cubo.
 
-    return df, dados
+    Retorna:
+    - df, dados
+    """
+    df, cubo = carregar_base(usar_cache=usar_cache, n_workers=n_workers, tamanho_bloco=tamanho_bloco)
+    return df, graficos_do_cubo(cubo)
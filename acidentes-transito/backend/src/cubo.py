@@ -0,0 +1,237 @@
+import numpy as np
+import pandas as pd
+from src.esquema import COLUNAS_CONTAGEM, COLUNAS_VEICULOS, COLUNAS_VITIMAS
+from src.turnos import ORDEM_TURNOS
+from src.metricas import medir
+
+DIAS_SEMANA = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+
+# Dimensões do cubo e a coluna do DataFrame tratado de onde cada uma vem.
+DIMENSOES_CUBO = {
+    'data': 'data_unificada',
+    'bairro': 'bairro',
+    'natureza_acidente': 'natureza_acidente',
+    'tipo': 'tipo',
+    'turno': 'turno',
+}
+# A hora não é dimensão (quase toda combinação do dia teria uma linha por
+# hora): cada linha guarda a contagem de acidentes em cada hora do dia, o que
+# basta para o gráfico por hora e respeita os mesmos filtros do cubo.
+HORAS = range(24)
+COLUNAS_HORA = [f'hora_{h:02d}' for h in HORAS]
+METRICAS_CUBO = ['acidentes'] + COLUNAS_CONTAGEM + COLUNAS_HORA
+
+
+def _agregar(dimensoes, metricas):
+    # Agrupa por uma única chave inteira que combina os códigos de todas as
+    # dimensões (nulo = código 0), o que evita o tratamento especial de
+    # NaN/categorias e as cópias de um groupby por várias colunas
+    codigos = []
+    valores = {}
+    for dimensao, serie in dimensoes.items():
+        codigo, valores[dimensao] = pd.factorize(serie, sort=True)
+        codigos.append(codigo + 1)
+    formato = [len(valores[d]) + 1 for d in dimensoes]
+    grupos, chave = pd.factorize(np.ravel_multi_index(codigos, formato))
+
+    cubo = pd.DataFrame(index=pd.RangeIndex(len(chave)))
+    for dimensao, codigo in zip(dimensoes, np.unravel_index(chave, formato)):
+        # reindex pelos códigos: -1 (nulo) não existe no índice e vira nulo
+        cubo[dimensao] = pd.Series(valores[dimensao]).reindex(codigo - 1).to_numpy()
+    for dimensao in ['bairro', 'natureza_acidente', 'tipo', 'turno']:
+        cubo[dimensao] = cubo[dimensao].astype('category')
+
+    # Ordena as linhas por grupo e soma cada faixa contígua com reduceat, uma
+    # métrica por vez: só a soma de uma coluna usa 64 bits antes de voltar ao
+    # menor inteiro que cabe (o groupby do pandas alargaria todas juntas)
+    ordem = np.argsort(grupos, kind='stable')
+    inicios = np.concatenate([[0], np.cumsum(np.bincount(grupos))[:-1]]).astype(np.intp)
+    for col, valores_metrica in metricas.items():
+        valores_metrica = np.asarray(valores_metrica)[ordem]
+        if len(chave):
+            soma = np.add.reduceat(valores_metrica, inicios, dtype=np.uint64)
+        else:
+            soma = np.zeros(0, dtype=np.uint64)
+        cubo[col] = pd.to_numeric(soma, downcast='unsigned')
+
+    return cubo
+
+
+def construir_cubo(df):
+    """
+    Agrega o DataFrame tratado em um cubo diário
+    (data x bairro x natureza x tipo x turno), com o número de acidentes,
+    as somas de veículos e vítimas e a contagem por hora do dia de cada
+    combinação.
+
+    Valores nulos nas dimensões são mantidos como um grupo próprio, para que
+    os totais do cubo batam com os do DataFrame.
+
+    Retorna:
+    - DataFrame com uma linha por combinação observada
+    """
+    dimensoes = {}
+    for dimensao, coluna in DIMENSOES_CUBO.items():
+        serie = df[coluna]
+        if dimensao == 'data':
+            serie = serie.dt.normalize()
+        dimensoes[dimensao] = serie
+
+    metricas = {'acidentes': np.ones(len(df), dtype=np.uint32)}
+    for col in COLUNAS_CONTAGEM:
+        metricas[col] = df[col].to_numpy()
+    hora = df['hora_limpa'].astype('float64').to_numpy()
+    for h, col in zip(HORAS, COLUNAS_HORA):
+        metricas[col] = (hora == h).astype(np.uint8)
+
+    return _agregar(dimensoes, metricas)
+
+
+def combinar_cubos(cubos):
+    """
+    Soma cubos parciais (ex.: um por bloco de linhas dos CSVs) em um único
+    cubo, igual ao que construir_cubo daria com todas as linhas juntas.
+    """
+    cubos = [c for c in cubos if c is not None]
+    todos = pd.concat(cubos, ignore_index=True)
+    return _agregar({d: todos[d] for d in DIMENSOES_CUBO},
+                    {m: todos[m].to_numpy() for m in METRICAS_CUBO})
+
+
+def _como_lista(valor):
+    if isinstance(valor, (list, tuple, set)):
+        return list(valor)
+    return [valor]
+
+
+def filtrar_cubo(cubo, ano_inicio=None, ano_fim=None, bairro=None, natureza=None, tipo=None):
+    """
+    Filtra o cubo por intervalo de anos e por bairro, natureza e tipo
+    (um valor ou uma lista de valores). Filtros None são ignorados.
+    """
+    mascara = np.ones(len(cubo), dtype=bool)
+    if ano_inicio is not None or ano_fim is not None:
+        anos = cubo['data'].dt.year
+        if ano_inicio is not None:
+            mascara &= (anos >= ano_inicio).to_numpy()
+        if ano_fim is not None:
+            mascara &= (anos <= ano_fim).to_numpy()
+    for coluna, valor in (('bairro', bairro), ('natureza_acidente', natureza), ('tipo', tipo)):
+        if valor is not None:
+            mascara &= cubo[coluna].isin(_como_lista(valor)).to_numpy()
+    return cubo[mascara]
+
+
+def serie_diaria(cubo, **filtros):
+    """
+    Número de acidentes por dia, a partir do cubo (mesmo resultado de
+    df.groupby('data_unificada').size() no DataFrame tratado).
+
+    Parâmetros:
+    - filtros: argumentos de filtrar_cubo
+    """
+    if filtros:
+        cubo = filtrar_cubo(cubo, **filtros)
+    serie = cubo.groupby('data')['acidentes'].sum().astype(np.int64)
+    serie.index.name = 'data_unificada'
+    return serie
+
+
+def _ranking(cubo, coluna):
+    # Equivalente ao value_counts() da coluna no DataFrame bruto; empates
+    # ficam em ordem alfabética para a resposta não depender da ordem das linhas
+    contagem = cubo.groupby(coluna, observed=True)['acidentes'].sum()
+    contagem = contagem[contagem > 0]
+    contagem.index = contagem.index.astype(object)
+    return contagem.sort_index().sort_values(ascending=False, kind='mergesort')
+
+
+@medir('graficos')
+def graficos_do_cubo(cubo, **filtros):
+    """
+    Monta os dados de todos os gráficos do dashboard a partir do cubo.
+
+    Parâmetros:
+    - cubo: saída de construir_cubo
+    - filtros: argumentos de filtrar_cubo (ano_inicio, ano_fim, bairro, natureza, tipo)
+
+    Retorna:
+    - dicionário no formato servido em /api/graficos
+    """
+    if filtros:
+        cubo = filtrar_cubo(cubo, **filtros)
+
+    dados = {}
+    acidentes = cubo['acidentes'].astype(np.int64)
+    datas = cubo['data']
+    dia_semana = datas.dt.dayofweek.astype('Int8')
+
+    # Acidentes por ano
+    por_ano = acidentes.groupby(datas.dt.year).sum().sort_index()
+    dados['acidentes_ano'] = {
+        'anos': [int(a) for a in por_ano.index],
+        'valores': por_ano.tolist()
+    }
+
+    # Acidentes por dia da semana
+    por_dia = acidentes.groupby(dia_semana).sum().reindex(range(7), fill_value=0)
+    dados['acidentes_dia'] = {
+        'dias': DIAS_SEMANA,
+        'valores': por_dia.tolist()
+    }
+
+    # Top 10 bairros
+    top_bairros = _ranking(cubo, 'bairro').head(10)
+    dados['top_bairros'] = {
+        'bairros': top_bairros.index.tolist(),
+        'valores': top_bairros.tolist()
+    }
+
+    # Natureza dos acidentes
+    natureza = _ranking(cubo, 'natureza_acidente')
+    dados['natureza'] = {
+        'naturezas': natureza.index.tolist(),
+        'valores': natureza.tolist()
+    }
+
+    # Tipos de acidentes
+    tipo = _ranking(cubo, 'tipo').head(20)
+    dados['tipo'] = {
+        'tipos': tipo.index.tolist(),
+        'valores': tipo.tolist()
+    }
+
+    # Heatmap (Dia da semana x Turno)
+    tabela = (
+        acidentes.groupby([dia_semana, cubo['turno'].astype(object)]).sum()
+        .unstack(fill_value=0)
+        .reindex(index=range(7), columns=ORDEM_TURNOS, fill_value=0)
+    )
+    dados['heatmap_turno'] = tabela.values.tolist()
+    dados['heatmap_turno_dias'] = DIAS_SEMANA
+    dados['heatmap_turno_turnos'] = ORDEM_TURNOS
+
+    # Veículos
+    soma_veiculos = cubo[COLUNAS_VEICULOS].sum().astype(int)
+    dados['veiculos'] = {
+        'tipos': soma_veiculos.index.tolist(),
+        'valores': soma_veiculos.values.tolist()
+    }
+
+    # Vítimas
+    soma_vitimas = cubo[COLUNAS_VITIMAS].sum().astype(int)
+    dados['vitimas'] = {
+        'tipos': soma_vitimas.index.tolist(),
+        'valores': soma_vitimas.values.tolist()
+    }
+
+    # Acidentes por hora do dia
+    por_hora = cubo[COLUNAS_HORA].sum().astype(np.int64)
+    por_hora.index = list(HORAS)
+    por_hora = por_hora[por_hora > 0]
+    dados['hora_dia'] = {
+        'horas': [int(h) for h in por_hora.index],
+        'valores': por_hora.tolist()
+    }
+
+    return dados
@@ -0,0 +1,102 @@
+import pandas as pd
+
+# Cabeçalho 'data' com BOM UTF-8 lido como latin1 (arquivo de 2016)
+BOM_LATIN1 = 'ï»¿'
+
+# Nomes com que a coluna de data aparece nos CSVs, em ordem de prioridade
+COLUNAS_DATA = ['data', 'DATA', BOM_LATIN1 + 'data']
+
+# Formatos testados na detecção; dia antes do mês tem prioridade, como no
+# antigo pd.to_datetime(dayfirst=True)
+FORMATOS_DATA = [
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%Y/%m/%d',
+    '%m/%d/%Y',
+    '%d/%m/%y',
+    '%Y-%m-%d %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+]
+
+
+def remover_bom(colunas):
+    """
+    Remove o BOM do início dos nomes de colunas ('ï»¿data' -> 'data').
+    """
+    limpas = []
+    for col in colunas:
+        if isinstance(col, str):
+            if col.startswith(BOM_LATIN1):
+                col = col[len(BOM_LATIN1):]
+            col = col.lstrip('\ufeff')
+        limpas.append(col)
+    return limpas
+
+
+def detectar_formato(valores, amostra=200):
+    """
+    Detecta o formato de uma coluna de datas a partir de uma amostra dos
+    valores distintos.
+
+    Parâmetros:
+    - valores: Series com as datas em texto
+    - amostra: quantidade de valores distintos testados
+
+    Retorna:
+    - o primeiro formato de FORMATOS_DATA que converte toda a amostra,
+      ou None se nenhum servir
+    """
+    distintos = pd.Series(valores.dropna().unique()[:amostra]).astype(str).str.strip()
+    if distintos.empty:
+        return None
+    for formato in FORMATOS_DATA:
+        if pd.to_datetime(distintos, format=formato, errors='coerce').notna().all():
+            return formato
+    return None
+
+
+def _inferir(valores):
+    # Caminho antigo, usado só quando não há formato explícito
+    dt = pd.to_datetime(valores, errors='coerce', dayfirst=True)
+    mask = dt.isna() & valores.notna()
+    if mask.any():
+        dt[mask] = pd.to_datetime(valores[mask], errors='coerce', dayfirst=False)
+    return dt
+
+
+def parsear_datas(valores, formato=None):
+    """
+    Converte uma coluna de datas em texto para datetime em uma única passada
+    com formato explícito. Valores que não seguem o formato caem na inferência
+    do pandas (dayfirst=True e, em seguida, dayfirst=False).
+    """
+    if pd.api.types.is_datetime64_any_dtype(valores):
+        return valores
+    if formato is None:
+        formato = detectar_formato(valores)
+    if formato is None:
+        return _inferir(valores)
+
+    texto = valores.where(valores.isna(), valores.astype(str).str.strip())
+    dt = pd.to_datetime(texto, format=formato, errors='coerce')
+    falhas = dt.isna() & valores.notna()
+    if falhas.any():
+        dt[falhas] = _inferir(valores[falhas])
+    return dt
+
+
+def unificar_datas(df):
+    """
+    Junta as colunas de data de todos os layouts (COLUNAS_DATA) em uma única
+    Series datetime, respeitando a ordem de prioridade.
+    """
+    resultado = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    for col in COLUNAS_DATA:
+        if col in df.columns:
+            faltando = resultado.isna()
+            if not faltando.any():
+                break
+            resultado[faltando] = parsear_datas(df.loc[faltando, col])
+    return resultado
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Contagens de veículos e vítimas por acidente
+COLUNAS_VEICULOS = ['auto', 'moto', 'ciclom', 'ciclista', 'pedestre', 'onibus', 'caminhao', 'viatura', 'outros']
+COLUNAS_VITIMAS = ['vitimas', 'vitimasfatais']
+COLUNAS_CONTAGEM = COLUNAS_VEICULOS + COLUNAS_VITIMAS
+
+# Colunas de texto com poucos valores distintos, guardadas como 'category'
+COLUNAS_DIMENSAO = [
+    'tipo', 'situacao', 'bairro', 'natureza', 'natureza_acidente', 'bairro_cruzamento',
+    'sentido_via', 'acidente_verificado', 'tempo_clima', 'situacao_semaforo', 'sinalizacao',
+    'condicao_via', 'conservacao_via', 'ponto_controle', 'situacao_placa', 'velocidade_max_via',
+    'mao_direcao', 'divisao_via1', 'divisao_via2', 'divisao_via3', 'dia_nome', 'turno',
+]
+
+# Campos de calendário e hora como inteiros pequenos (nullable, pois podem faltar)
+TIPOS_CALENDARIO = {'ano': 'Int16', 'mes': 'Int8', 'dia_semana': 'Int8', 'hora_limpa': 'Int8'}
+
+# Identificadores que os arquivos trazem ora como número (12.0), ora como
+# texto ('12', '12,0', 'S/N')
+COLUNAS_CODIGO = ['numero', 'num_semaforo']
+
+# Colunas brutas ou intermediárias que já estão representadas em outra coluna:
+# as datas em texto em 'data_unificada' e a descrição em 'descricao_limpa'
+COLUNAS_INTERMEDIARIAS = ['data', 'DATA', 'ï»¿data', 'data_dt', 'DATA_dt', 'i_data_dt', 'descricao']
+
+
+def _menor_inteiro(serie):
+    # Inteiro sem sinal mais estreito que comporta a coluna; None se houver
+    # frações ou valores negativos
+    valores = serie.to_numpy()
+    if len(valores) == 0:
+        return np.uint8
+    if (valores < 0).any() or (np.mod(valores, 1) != 0).any():
+        return None
+    return np.min_scalar_type(int(valores.max()))
+
+
+def _texto_do_codigo(valor):
+    # 12.0, '12' e '12,0' viram '12'; textos como 'S/N' ficam como estão
+    if not isinstance(valor, str) and pd.isna(valor):
+        return valor
+    texto = str(valor).strip()
+    try:
+        numero = float(texto.replace(',', '.'))
+    except ValueError:
+        return texto
+    return str(int(numero)) if numero.is_integer() else texto
+
+
+def padronizar_texto(df):
+    """
+    Deixa cada coluna de texto com um único tipo, para que o DataFrame lido
+    de volta do cache (Parquet) seja igual ao recém-tratado:
+    - códigos (numero, num_semaforo) como texto sem casas decimais ('12')
+    - demais colunas object com números e textos misturados como texto
+
+    Retorna:
+    - o próprio df, alterado
+    """
+    for col in COLUNAS_CODIGO:
+        if col in df.columns:
+            df[col] = df[col].map(_texto_do_codigo).astype(object)
+    for col in df.select_dtypes(include='object').columns:
+        if pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            df[col] = df[col].map(lambda x: x if pd.isna(x) else str(x))
+    return df
+
+
+def compactar(df):
+    """
+    Converte o DataFrame tratado para a representação compacta usada em memória:
+    - contagens como inteiros sem sinal (uint8/uint16)
+    - dimensões de texto como 'category'
+    - ano, mês, dia da semana e hora como inteiros nullable pequenos
+    - uma única coluna de data (data_unificada), sem as intermediárias
+    - colunas de texto com um único tipo (padronizar_texto)
+
+    Retorna:
+    - novo DataFrame compacto
+    """
+    df = df.drop(columns=[c for c in COLUNAS_INTERMEDIARIAS if c in df.columns])
+    padronizar_texto(df)
+
+    for col in COLUNAS_CONTAGEM:
+        if col in df.columns:
+            tipo = _menor_inteiro(df[col])
+            if tipo is not None:
+                df[col] = df[col].astype(tipo)
+
+    for col in COLUNAS_DIMENSAO:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
+    for col, tipo in TIPOS_CALENDARIO.items():
+        if col in df.columns:
+            df[col] = df[col].astype(tipo)
+
+    return df
+
+
+def memoria_por_linha(df):
+    """
+    Retorna (memória total em bytes, bytes por linha) do DataFrame.
+    """
+    total = int(df.memory_usage(deep=True).sum())
+    return total, total / max(len(df), 1)
@@ -0,0 +1,38 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def janelas_defasagem(valores, dimensao, horizonte):
+    """
+    Monta a matriz de defasagens (lags) e a de alvos de uma série para
+    modelos de regressão com previsão de vários passos à frente.
+
+    Cada linha j corresponde a uma janela de dimensao + horizonte valores
+    consecutivos x[j], ..., x[j + dimensao + horizonte - 1]:
+    - X[j] = x[j + dimensao - 1], x[j + dimensao - 2], ..., x[j]
+      (lag mais recente primeiro)
+    - Y[j, h] = x[j + dimensao + h], o valor h + 1 passos após o último lag
+
+    As duas matrizes são views da série (sem cópia) e são somente leitura.
+
+    Parâmetros:
+    - valores: array ou Series 1D
+    - dimensao: número de defasagens
+    - horizonte: número de passos à frente
+
+    Retorna:
+    - X com shape (n - dimensao - horizonte + 1, dimensao)
+    - Y com shape (n - dimensao - horizonte + 1, horizonte)
+    """
+    valores = np.asarray(valores, dtype=float)
+    tamanho = dimensao + horizonte
+    if len(valores) < tamanho:
+        raise ValueError(
+            f"A série tem {len(valores)} valores; são necessários pelo menos {tamanho} "
+            f"(dimensão {dimensao} + horizonte {horizonte})."
+        )
+
+    janelas = sliding_window_view(valores, tamanho)
+    X = janelas[:, dimensao - 1::-1]
+    Y = janelas[:, dimensao:]
+    return X, Y
@@ -0,0 +1,208 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites dos histogramas de duração, em segundos
+LIMITES_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+PREFIXO = 'acidentes_'
+
+_trava = threading.Lock()
+_contadores = {}    # (nome, rótulos) -> valor
+_medidores = {}     # (nome, rótulos) -> valor
+_histogramas = {}   # (nome, rótulos) -> [contagens por limite, soma, total]
+_descricoes = {}    # nome -> (tipo, ajuda)
+
+
+def _apos_fork():
+    # A trava pode ter sido copiada fechada por outra thread no momento do fork
+    global _trava
+    _trava = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+
+def _rotulos(rotulos):
+    return tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def _descrever(nome, tipo, ajuda):
+    if nome not in _descricoes:
+        _descricoes[nome] = (tipo, ajuda)
+
+
+def incrementar(nome, valor=1, ajuda='', **rotulos):
+    """Soma `valor` a um contador."""
+    chave = (PREFIXO + nome, _rotulos(rotulos))
+    with _trava:
+        _descrever(chave[0], 'counter', ajuda)
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+
+def definir(nome, valor, ajuda='', **rotulos):
+    """Define o valor atual de um medidor (gauge)."""
+    chave = (PREFIXO + nome, _rotulos(rotulos))
+    with _trava:
+        _descrever(chave[0], 'gauge', ajuda)
+        _medidores[chave] = valor
+
+
+def observar(nome, valor, ajuda='', **rotulos):
+    """Registra uma observação em um histograma."""
+    chave = (PREFIXO + nome, _rotulos(rotulos))
+    with _trava:
+        _descrever(chave[0], 'histogram', ajuda)
+        histograma = _histogramas.get(chave)
+        if histograma is None:
+            histograma = _histogramas[chave] = [[0] * len(LIMITES_PADRAO), 0.0, 0]
+        posicao = bisect.bisect_left(LIMITES_PADRAO, valor)
+        if posicao < len(LIMITES_PADRAO):
+            histograma[0][posicao] += 1
+        histograma[1] += valor
+        histograma[2] += 1
+
+
+# ======================================
+#    ETAPAS DO PIPELINE
+# ======================================
+@contextmanager
+def cronometrar(etapa):
+    """
+    Mede a duração de uma etapa do pipeline:
+
+        with cronometrar('carregar_dados'):
+            ...
+    """
+    inicio = time.perf_counter()
+    erro = False
+    try:
+        yield
+    except Exception:
+        erro = True
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        observar('etapa_duracao_segundos', duracao, 'Duração das etapas do pipeline', etapa=etapa)
+        definir('etapa_ultima_duracao_segundos', duracao, 'Duração da última execução da etapa', etapa=etapa)
+        incrementar('etapa_execucoes_total', ajuda='Execuções das etapas do pipeline',
+                    etapa=etapa, resultado='erro' if erro else 'ok')
+
+
+def medir(etapa):
+    """Decorador equivalente a `with cronometrar(etapa)` em volta da função."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with cronometrar(etapa):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def registrar_linhas(etapa, linhas):
+    """Número de linhas produzidas pela última execução da etapa."""
+    definir('etapa_linhas', int(linhas), 'Linhas produzidas pela última execução da etapa', etapa=etapa)
+
+
+def registrar_cache(cache, acerto):
+    """Conta um acerto ou uma falta em um cache (snapshot, partições, registro de modelos...)."""
+    incrementar('cache_consultas_total', ajuda='Consultas aos caches por resultado',
+                cache=cache, resultado='acerto' if acerto else 'falta')
+
+
+# ======================================
+#    REQUISIÇÕES HTTP
+# ======================================
+def registrar_requisicao(rota, metodo, status, duracao):
+    incrementar('http_requisicoes_total', ajuda='Requisições HTTP atendidas',
+                rota=rota, metodo=metodo, status=status)
+    observar('http_duracao_segundos', duracao, 'Latência das requisições HTTP', rota=rota, metodo=metodo)
+
+
+# ======================================
+#    EXPOSIÇÃO (FORMATO DE TEXTO DO PROMETHEUS)
+# ======================================
+def _formatar_rotulos(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ''
+    texto = ','.join('{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                     for k, v in pares)
+    return '{' + texto + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _rotulo_worker():
+    # Cada worker do gunicorn tem suas próprias métricas e uma coleta é
+    # respondida por qualquer um deles: o pid separa as séries, para que o
+    # Prometheus não veja contadores voltando a cada coleta. Some com
+    # sum without (worker) (...) nas consultas
+    return (('worker', str(os.getpid())),)
+
+
+def exportar():
+    """
+    Retorna todas as métricas do processo no formato de texto do Prometheus
+    (versão 0.0.4), cada série com o rótulo worker (pid do processo). A taxa
+    de acerto de cada cache é calculada na exportação.
+    """
+    with _trava:
+        contadores = dict(_contadores)
+        medidores = dict(_medidores)
+        histogramas = {k: (list(v[0]), v[1], v[2]) for k, v in _histogramas.items()}
+        descricoes = dict(_descricoes)
+
+    # Taxa de acerto por cache
+    consultas = {}
+    for (nome, rotulos), valor in contadores.items():
+        if nome == PREFIXO + 'cache_consultas_total':
+            dic = dict(rotulos)
+            acertos, total = consultas.get(dic['cache'], (0, 0))
+            consultas[dic['cache']] = (acertos + (valor if dic['resultado'] == 'acerto' else 0), total + valor)
+    nome_taxa = PREFIXO + 'cache_taxa_acerto'
+    for cache, (acertos, total) in consultas.items():
+        descricoes.setdefault(nome_taxa, ('gauge', 'Fração das consultas ao cache que foram acertos'))
+        medidores[(nome_taxa, (('cache', cache),))] = acertos / total if total else 0.0
+
+    worker = _rotulo_worker()
+    linhas = []
+    for nome in sorted(descricoes):
+        tipo, ajuda = descricoes[nome]
+        if ajuda:
+            linhas.append(f'# HELP {nome} {ajuda}')
+        linhas.append(f'# TYPE {nome} {tipo}')
+        if tipo == 'histogram':
+            for (n, rotulos), (contagens, soma, total) in sorted(histogramas.items()):
+                if n != nome:
+                    continue
+                acumulado = 0
+                rotulos = rotulos + worker
+                for limite, contagem in zip(LIMITES_PADRAO, contagens):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{_formatar_rotulos(rotulos, [("le", repr(limite))])} {acumulado}')
+                linhas.append(f'{nome}_bucket{_formatar_rotulos(rotulos, [("le", "+Inf")])} {total}')
+                linhas.append(f'{nome}_sum{_formatar_rotulos(rotulos)} {_numero(soma)}')
+                linhas.append(f'{nome}_count{_formatar_rotulos(rotulos)} {total}')
+        else:
+            valores = contadores if tipo == 'counter' else medidores
+            for (n, rotulos), valor in sorted(valores.items()):
+                if n == nome:
+                    linhas.append(f'{nome}{_formatar_rotulos(rotulos, worker)} {_numero(valor)}')
+    return '\n'.join(linhas) + '\n'
+
+
+def limpar():
+    """Zera todas as métricas do processo."""
+    with _trava:
+        _contadores.clear()
+        _medidores.clear()
+        _histogramas.clear()
+        _descricoes.clear()
@@ -1,12 +1,61 @@
 import numpy as np
-import pandas as pd
-from sklearn.svm import SVR 
-from sklearn.metrics import mean_absolute_error, mean_squared_error, mean_absolute_percentage_error
+from sklearn.svm import SVR
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from joblib import Parallel, delayed
+from src.janelas import janelas_defasagem
+from src.metricas import medir
 import warnings
 warnings.filterwarnings('ignore')
 
-def modelar_svr(serie_data):
-    
+# Hiperparâmetros do modelo, registrados junto com cada modelo salvo
+PARAMETROS_SVR = {
+    'C': 1000.0,
+    'epsilon': 0.001,
+    'gamma': 3.2,
+    'dimension': 6,
+    'stepahead': 6,
+    'stepahead_max': 12,
+}
+
+
+def janelas_svr(ndataset, parametros):
+    """
+    Janelas de treino do SVR direto: defasagens com `dimension` lags e alvos
+    de 1 a `stepahead_max` passos à frente. Todos os passos são treinados nas
+    mesmas linhas, as que têm os stepahead_max alvos na série.
+    """
+    return janelas_defasagem(ndataset, parametros['dimension'], parametros['stepahead_max'])
+
+
+def ajustar_passo(Input, y, C, epsilon, gamma):
+    """Ajusta o SVR de um passo do horizonte."""
+    mySVR = SVR(C=C, epsilon=epsilon, gamma=gamma)
+    mySVR.fit(Input, y)
+    return mySVR
+
+
+def _prever_passo(Input, y, last_instance, C, epsilon, gamma):
+    # Ajusta o SVR de um passo do horizonte e prevê a partir da última janela
+    return ajustar_passo(Input, y, C, epsilon, gamma).predict(last_instance)[0]
+
+
+@medir('modelar_svr')
+def modelar_svr(serie_data, n_jobs=-1, parametros=None):
+    """
+    Treina um SVR por passo do horizonte (estratégia direta) e prevê os
+    próximos dias da série.
+
+    Parâmetros:
+    - serie_data: Series diária com o número de acidentes
+    - n_jobs: processos usados para treinar os passos em paralelo, como no
+      joblib (-1 = todos os núcleos, 1 = em série)
+    - parametros: substitui valores de PARAMETROS_SVR (ex.: os melhores de
+      buscar_hiperparametros(serie, 'svr'))
+
+    Retorna:
+    - dicionário com mae, mse, rmse, mape e previsao
+    """
+
     serie_data = serie_data.fillna(0)
 
         # --- validação inicial da série ---
@@ -27,47 +76,33 @@ def modelar_svr(serie_data):
     minData = np.min(dataset)
 
     ndataset = (dataset - minData) / (maxData - minData)
-    datasetSeries = pd.Series(ndataset)
-
-    dimension = 6
-    stepahead = 6         # <-- aqui você define quantos passos quer prever
-    stepahead_max = 12    # <-- fixo para manter coerência nas previsões
 
-    # Criação do dataset deslocado com base em stepahead_max
-    datasetShifted = pd.concat([datasetSeries.shift(i) for i in range(dimension + stepahead_max)], axis=1)
-    print(f"Tamanho do datasetShifted (antes de dropar NaNs): {datasetShifted.shape}")
-    print(datasetShifted.head(25))
+    parametros = {**PARAMETROS_SVR, **(parametros or {})}
+    stepahead = parametros['stepahead']          # <-- quantos passos prever
 
-    # Entrada (lags)
-    Input = datasetShifted.iloc[dimension + (stepahead_max - 1):, -dimension:]
-    print(f"Tamanho do Input (após slice): {Input.shape}")
+    # Matriz de defasagens (lag mais recente primeiro) e alvos de 1 a stepahead_max
+    # passos à frente, como views da série normalizada
+    Input, Targets = janelas_svr(ndataset, parametros)
+    print(f"Tamanho do Input: {Input.shape}")
 
     # listas para armazenar
     previsoes = []
     reais = []
 
-    for i in range(stepahead):
-        # Target deslocado i passos à frente (baseado em stepahead_max)
-        Target = datasetShifted.iloc[dimension + (stepahead_max - 1):, -(dimension + i + 1)]
-
-        # concatena Input + Target e remove NaNs apenas nessa fatia
-        df_temp = pd.concat([Input, Target], axis=1).dropna()
-        if df_temp.empty:
-            raise ValueError(f"Após remover NaNs, não restaram dados suficientes para o passo {i+1}.")
-
-        X = df_temp.iloc[:, :-1]
-        y = df_temp.iloc[:, -1]
-
-        mySVR = SVR(C=1000.0, epsilon=0.001, gamma=3.2)
-        mySVR.fit(X, y)
+    # prevê usando a última janela da série
+    last_instance = Input[-1:, :]
 
-        # prevê usando a última linha **original** de Input
-        last_instance = Input.iloc[-1, :].values.reshape(1, -1)
-        previsao_norm = mySVR.predict(last_instance)[0]
+    # Os modelos de cada passo são independentes e são treinados em paralelo
+    previsoes_norm = Parallel(n_jobs=n_jobs)(
+        delayed(_prever_passo)(Input, Targets[:, i], last_instance,
+                               parametros['C'], parametros['epsilon'], parametros['gamma'])
+        for i in range(stepahead)
+    )
 
+    for i, previsao_norm in enumerate(previsoes_norm):
         # dessinaliza
         previsao_real = previsao_norm * (maxData - minData) + minData
-        valor_real = y.iloc[-1] * (maxData - minData) + minData
+        valor_real = Targets[-1, i] * (maxData - minData) + minData
 
         print(f"Previsão passo {i+1}: {int(round(previsao_real))}")
 
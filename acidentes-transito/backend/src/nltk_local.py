@@ -0,0 +1,79 @@
+import os
+from functools import lru_cache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # backend/src
+
+# Dados do NLTK (stopwords, punkt_tab) ficam em uma pasta local, instalados uma
+# vez, a partir da pasta backend, com: python -m src.nltk_local
+# A variável de ambiente NLTK_DATA, se definida, tem prioridade.
+PASTA_NLTK = os.environ.get('NLTK_DATA') or os.path.abspath(os.path.join(BASE_DIR, '..', 'nltk_data'))
+
+# Recursos usados pelo tratamento das descrições (punkt nas versões antigas do
+# NLTK, punkt_tab nas novas)
+RECURSOS_NLTK = ['stopwords', 'punkt', 'punkt_tab']
+
+
+@lru_cache(maxsize=None)
+def _nltk():
+    # Importado só no primeiro uso; nunca tenta baixar recursos
+    import nltk
+    if PASTA_NLTK not in nltk.data.path:
+        nltk.data.path.insert(0, PASTA_NLTK)
+    return nltk
+
+
+def _recurso_ausente(nome, erro):
+    return LookupError(
+        f"Recurso do NLTK '{nome}' não encontrado (procurado em {PASTA_NLTK} e nas pastas padrão). "
+        f"Instale com: python -m src.nltk_local (na pasta backend) ou "
+        f"python -m nltk.downloader -d {PASTA_NLTK} {' '.join(RECURSOS_NLTK)}\n{erro}"
+    )
+
+
+@lru_cache(maxsize=None)
+def stopwords_portugues():
+    """
+    Stopwords do português, lidas dos dados locais do NLTK.
+    """
+    nltk = _nltk()
+    try:
+        return frozenset(nltk.corpus.stopwords.words('portuguese'))
+    except LookupError as e:
+        raise _recurso_ausente('stopwords', e) from None
+
+
+def word_tokenize(texto, language='english'):
+    """
+    nltk.word_tokenize com os dados locais (precisa do recurso punkt, ou
+    punkt_tab nas versões mais novas do NLTK).
+    """
+    nltk = _nltk()
+    try:
+        return nltk.tokenize.word_tokenize(texto, language=language)
+    except LookupError as e:
+        raise _recurso_ausente('punkt punkt_tab', e) from None
+
+
+@lru_cache(maxsize=None)
+def regex_contracoes():
+    """
+    Expressões que o tokenizador do NLTK usa para separar contrações do inglês.
+    """
+    from nltk.tokenize.destructive import NLTKWordTokenizer
+    return tuple(NLTKWordTokenizer.CONTRACTIONS2 + NLTKWordTokenizer.CONTRACTIONS3)
+
+
+def instalar_recursos(pasta=PASTA_NLTK):
+    """
+    Baixa os recursos do NLTK usados pelo backend para a pasta local. É a
+    única função que acessa a rede: o tratamento nunca baixa nada sozinho.
+    """
+    import nltk
+    for nome in RECURSOS_NLTK:
+        if not nltk.download(nome, download_dir=pasta, quiet=True):
+            raise RuntimeError(f"Não foi possível baixar o recurso do NLTK '{nome}'.")
+    print(f'Recursos do NLTK instalados em {pasta}: {", ".join(RECURSOS_NLTK)}')
+
+
+if __name__ == '__main__':
+    instalar_recursos()
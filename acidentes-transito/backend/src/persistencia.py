@@ -0,0 +1,380 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from src.cache_dados import PASTA_CACHE
+from src import metricas
+
+PASTA_PERSISTENCIA = os.path.join(PASTA_CACHE, 'persistencia')
+ARQUIVO_SQLITE = os.environ.get('PERSISTENCIA_SQLITE') or os.path.join(PASTA_PERSISTENCIA, 'previsoes.db')
+
+# O Firestore aceita no máximo 500 operações por commit em lote
+LIMITE_LOTE = 500
+
+_trava = threading.Lock()
+_trava_gravacao = threading.Lock()   # gravações em série, sem bloquear as leituras
+_executor = None
+_backends = None
+_hashes = {}   # nome do backend -> {colecao/documento: hash}
+
+
+def _apos_fork():
+    # O processo filho (worker do gunicorn) herda o executor sem a thread
+    # dele e travas possivelmente fechadas: recria tudo sob demanda
+    global _trava, _trava_gravacao, _executor
+    _trava = threading.Lock()
+    _trava_gravacao = threading.Lock()
+    _executor = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+
+# ======================================
+#    BACKENDS
+# ======================================
+class BackendMemoria:
+    """
+    Guarda os documentos em um dicionário. Usado em testes e para rodar a API
+    sem Firestore (PERSISTENCIA=memoria).
+    """
+    nome = 'memoria'
+    persistente = False
+
+    def __init__(self):
+        self.documentos = {}
+        self.lotes = []
+
+    def gravar_lote(self, operacoes):
+        for colecao, documento, dados in operacoes:
+            self.documentos[(colecao, documento)] = dados
+        self.lotes.append(list(operacoes))
+
+    def ler(self, colecao, documento):
+        return self.documentos.get((colecao, documento))
+
+    def listar(self, colecao):
+        return [dados for (c, _), dados in sorted(self.documentos.items()) if c == colecao]
+
+
+class BackendSQLite:
+    """
+    Armazenamento local padrão: um arquivo SQLite com uma tabela de documentos
+    (colecao, documento, dados em JSON, hash, atualizado_em). Não depende de
+    rede nem de credenciais e pode ser consultado direto com sqlite3.
+
+    O hash de cada documento fica na própria tabela, então apagar o arquivo
+    faz a próxima gravação reenviar tudo.
+    """
+    nome = 'sqlite'
+    persistente = True
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or ARQUIVO_SQLITE
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        conexao = self._conectar()
+        try:
+            # WAL: leituras das rotas não esperam a gravação em andamento
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS documentos ('
+                ' colecao TEXT NOT NULL, documento TEXT NOT NULL, dados TEXT NOT NULL,'
+                ' hash TEXT NOT NULL, atualizado_em TEXT NOT NULL,'
+                ' PRIMARY KEY (colecao, documento))'
+            )
+            conexao.commit()
+        finally:
+            conexao.close()
+
+    def _conectar(self):
+        # Uma conexão por operação: vale para qualquer thread e sobrevive a fork
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def gravar_lote(self, operacoes):
+        linhas = [
+            (colecao, documento, json.dumps(dados, ensure_ascii=False, default=str), hash_documento(dados))
+            for colecao, documento, dados in operacoes
+        ]
+        conexao = self._conectar()
+        try:
+            with conexao:  # uma transação para o lote inteiro
+                conexao.executemany(
+                    "INSERT OR REPLACE INTO documentos (colecao, documento, dados, hash, atualizado_em)"
+                    " VALUES (?, ?, ?, ?, datetime('now'))",
+                    linhas,
+                )
+        finally:
+            conexao.close()
+
+    def ler(self, colecao, documento):
+        conexao = self._conectar()
+        try:
+            linha = conexao.execute('SELECT dados FROM documentos WHERE colecao = ? AND documento = ?',
+                                    (colecao, documento)).fetchone()
+        finally:
+            conexao.close()
+        return json.loads(linha[0]) if linha else None
+
+    def listar(self, colecao):
+        conexao = self._conectar()
+        try:
+            linhas = conexao.execute('SELECT dados FROM documentos WHERE colecao = ? ORDER BY documento',
+                                     (colecao,)).fetchall()
+        finally:
+            conexao.close()
+        return [json.loads(linha[0]) for linha in linhas]
+
+    def hashes(self):
+        conexao = self._conectar()
+        try:
+            linhas = conexao.execute('SELECT colecao, documento, hash FROM documentos').fetchall()
+        finally:
+            conexao.close()
+        return {f'{c}/{d}': h for c, d, h in linhas}
+
+
+class BackendFirestore:
+    """
+    Grava no Firestore com commits em lote. O cliente só é criado no primeiro
+    acesso (importando firebase_config), fora do caminho de inicialização.
+
+    Com FIRESTORE_EMULATOR_HOST definida, o cliente do Firestore usa o emulador
+    local; como o emulador começa vazio, os hashes gravados não são guardados
+    em disco nesse caso.
+    """
+    nome = 'firestore'
+
+    def __init__(self, db=None):
+        self._db = db
+        self.persistente = not os.environ.get('FIRESTORE_EMULATOR_HOST')
+
+    @property
+    def db(self):
+        if self._db is not None:
+            return self._db
+        # Não guardado aqui: obter_db cria um cliente próprio em cada processo
+        from firebase_config import obter_db
+        return obter_db()
+
+    def gravar_lote(self, operacoes):
+        db = self.db
+        for inicio in range(0, len(operacoes), LIMITE_LOTE):
+            lote = db.batch()
+            for colecao, documento, dados in operacoes[inicio:inicio + LIMITE_LOTE]:
+                lote.set(db.collection(colecao).document(documento), dados)
+            lote.commit()
+
+    def ler(self, colecao, documento):
+        snapshot = self.db.collection(colecao).document(documento).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def listar(self, colecao):
+        return [d.to_dict() for d in self.db.collection(colecao).stream()]
+
+
+BACKENDS = {'sqlite': BackendSQLite, 'firestore': BackendFirestore, 'memoria': BackendMemoria}
+
+
+def nomes_padrao():
+    """
+    Backends lidos da variável PERSISTENCIA, separados por vírgula
+    (ex.: PERSISTENCIA=sqlite,firestore). Sem ela, só o SQLite local: o
+    Firestore nunca é ligado só porque há credenciais no disco, apenas quando
+    pedido aqui ou passado a criar_backends/configurar_backends. O ponto de
+    entrada de produção (wsgi.py) usa sqlite,firestore por padrão.
+    """
+    if os.environ.get('PERSISTENCIA'):
+        return [n.strip() for n in os.environ['PERSISTENCIA'].split(',') if n.strip()]
+    return ['sqlite']
+
+
+def criar_backends(nomes=None):
+    """
+    Cria os backends pelo nome, na ordem dada (padrão: nomes_padrao()).
+    O primeiro é o usado nas leituras.
+    """
+    backends = []
+    for nome in nomes or nomes_padrao():
+        if nome not in BACKENDS:
+            raise ValueError(f"Backend de persistência desconhecido: {nome} (use {', '.join(BACKENDS)})")
+        backends.append(BACKENDS[nome]())
+    print(f"Persistência: {', '.join(b.nome for b in backends)}")
+    if not any(b.nome == 'firestore' for b in backends):
+        print('Aviso: o Firestore está desligado; o dashboard, que lê as previsões de lá, '
+              'não verá os novos treinos (PERSISTENCIA=sqlite,firestore para ligar)')
+    return backends
+
+
+def configurar_backends(*backends):
+    """
+    Troca os backends usados pelas gravações e leituras e descarta os hashes
+    dos anteriores.
+    """
+    global _backends
+    with _trava, _trava_gravacao:
+        _backends = list(backends)
+        _hashes.clear()
+
+
+def obter_backends():
+    global _backends
+    with _trava:
+        if _backends is None:
+            _backends = criar_backends()
+        return list(_backends)
+
+
+def ler_documento(colecao, documento):
+    """Lê um documento do primeiro backend (o armazenamento local, por padrão)."""
+    return obter_backends()[0].ler(colecao, documento)
+
+
+def listar_documentos(colecao):
+    """Lista os documentos de uma coleção no primeiro backend."""
+    return obter_backends()[0].listar(colecao)
+
+
+# ======================================
+#    HASHES DA ÚLTIMA VERSÃO GRAVADA
+# ======================================
+def hash_documento(dados):
+    """
+    Hash do conteúdo de um documento (chaves ordenadas, independente da ordem
+    de inserção).
+    """
+    texto = json.dumps(dados, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _arquivo_hashes(backend):
+    return os.path.join(PASTA_PERSISTENCIA, f'hashes-{backend.nome}.json')
+
+
+def _carregar_hashes(backend):
+    if hasattr(backend, 'hashes'):
+        return backend.hashes()
+    if not backend.persistente:
+        return {}
+    try:
+        with open(_arquivo_hashes(backend), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _salvar_hashes(backend, hashes):
+    # Backends que guardam o hash junto do documento não precisam do arquivo
+    if hasattr(backend, 'hashes') or not backend.persistente:
+        return
+    os.makedirs(PASTA_PERSISTENCIA, exist_ok=True)
+    caminho = _arquivo_hashes(backend)
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f)
+    os.replace(temporario, caminho)
+
+
+# ======================================
+#    GRAVAÇÃO
+# ======================================
+def _gravar_no_backend(backend, documentos, forcar):
+    with _trava_gravacao:
+        hashes = _hashes.get(backend.nome)
+        if hashes is None:
+            hashes = _hashes[backend.nome] = _carregar_hashes(backend)
+
+        alterados = []
+        for (colecao, documento), dados in documentos.items():
+            chave = f'{colecao}/{documento}'
+            novo = hash_documento(dados)
+            if forcar or hashes.get(chave) != novo:
+                alterados.append((chave, novo, (colecao, documento, dados)))
+
+        inalterados = len(documentos) - len(alterados)
+        metricas.incrementar('persistencia_documentos_total', inalterados,
+                             'Documentos enviados à persistência por resultado',
+                             backend=backend.nome, resultado='inalterado')
+        if not alterados:
+            print(f'Persistência ({backend.nome}): nenhum documento alterado')
+            return 0
+
+        with metricas.cronometrar(f'persistencia_lote_{backend.nome}'):
+            backend.gravar_lote([operacao for _, _, operacao in alterados])
+        for chave, novo, _ in alterados:
+            hashes[chave] = novo
+        _salvar_hashes(backend, hashes)
+
+    metricas.incrementar('persistencia_documentos_total', len(alterados),
+                         'Documentos enviados à persistência por resultado',
+                         backend=backend.nome, resultado='gravado')
+    print(f'Persistência ({backend.nome}): {len(alterados)} documentos gravados, {inalterados} inalterados')
+    return len(alterados)
+
+
+def gravar_documentos(documentos, forcar=False, backends=None):
+    """
+    Grava, em um único lote por backend, os documentos que mudaram desde a
+    última gravação naquele backend. A falha de um backend (ex.: Firestore
+    fora do ar) não impede a gravação nos demais; na próxima chamada os
+    documentos que ficaram para trás são enviados de novo.
+
+    Parâmetros:
+    - documentos: dicionário {(colecao, documento): dados}
+    - forcar: grava todos, mesmo os que não mudaram
+    - backends: padrão: os configurados (obter_backends)
+
+    Retorna:
+    - dicionário {backend: documentos gravados}; None para os que falharam
+    """
+    gravados = {}
+    for backend in backends or obter_backends():
+        try:
+            gravados[backend.nome] = _gravar_no_backend(backend, documentos, forcar)
+        except Exception as e:
+            print(f'Erro ao gravar no backend {backend.nome}: {e}')
+            metricas.incrementar('persistencia_erros_total', ajuda='Falhas de gravação por backend',
+                                 backend=backend.nome)
+            gravados[backend.nome] = None
+    return gravados
+
+
+def _executar_registrando_erro(funcao, args, kwargs):
+    try:
+        return funcao(*args, **kwargs)
+    except Exception:
+        traceback.print_exc()
+        raise
+
+
+def executar_em_segundo_plano(funcao, *args, **kwargs):
+    """
+    Roda funcao(*args, **kwargs) na thread de persistência, na ordem de
+    chegada junto com as demais gravações. Útil para medir ou montar os
+    documentos dentro da própria tarefa.
+
+    Retorna:
+    - Future com o retorno da função
+    """
+    global _executor
+    with _trava:
+        # Criado sob demanda no processo que o usa (ver _apos_fork)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='persistencia')
+    return _executor.submit(_executar_registrando_erro, funcao, args, kwargs)
+
+
+def gravar_em_segundo_plano(documentos, forcar=False):
+    """
+    Como gravar_documentos, mas em uma thread própria: a inicialização e as
+    requisições não esperam a rede. As gravações são feitas na ordem de chegada.
+
+    Retorna:
+    - Future com o retorno de gravar_documentos
+    """
+    return executar_em_segundo_plano(gravar_documentos, documentos, forcar)
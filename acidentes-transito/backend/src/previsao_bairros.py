@@ -0,0 +1,121 @@
+import os
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.linear_model import Ridge
+from src.janelas import janelas_defasagem
+from src.metricas import medir, registrar_linhas
+
+# Modelo leve por bairro: regressão linear (Ridge) sobre as últimas `dimensao`
+# contagens diárias, com uma saída por passo do horizonte
+PARAMETROS_BAIRROS = {
+    'dimensao': 14,
+    'horizonte': 7,
+    'validacao': 30,
+    'alpha': 1.0,
+}
+
+
+def matriz_bairros(cubo, inicio=None, fim=None, min_acidentes=1):
+    """
+    Monta as séries diárias de todos os bairros de uma vez, a partir do cubo.
+
+    Parâmetros:
+    - cubo: saída de construir_cubo
+    - inicio, fim: intervalo de datas (inclusive); padrão: todo o cubo. Quando
+      informados, a matriz cobre exatamente o intervalo, com zeros nos dias
+      sem registro nas pontas
+    - min_acidentes: bairros com menos acidentes no intervalo são descartados
+
+    Retorna:
+    - datas (DatetimeIndex diário), lista de bairros e matriz float
+      (len(datas) x len(bairros)) com o número de acidentes; dias sem registro = 0
+    """
+    contagens = cubo.groupby(['data', 'bairro'], observed=True)['acidentes'].sum()
+    tabela = contagens.unstack('bairro', fill_value=0)
+    if inicio is not None:
+        tabela = tabela.loc[pd.Timestamp(inicio):]
+    if fim is not None:
+        tabela = tabela.loc[:pd.Timestamp(fim)]
+
+    primeira = pd.Timestamp(inicio) if inicio is not None else tabela.index.min()
+    ultima = pd.Timestamp(fim) if fim is not None else tabela.index.max()
+    if pd.isna(primeira) or pd.isna(ultima):
+        datas = pd.DatetimeIndex([], freq='D')
+    else:
+        datas = pd.date_range(primeira, ultima, freq='D')
+    tabela = tabela.reindex(datas, fill_value=0)
+    tabela = tabela.loc[:, tabela.sum() >= min_acidentes]
+
+    return datas, [str(b) for b in tabela.columns], tabela.to_numpy(dtype=float)
+
+
+def _prever_bairros(matriz, dimensao, horizonte, validacao, alpha):
+    # Ajusta e prevê um lote de bairros (colunas da matriz)
+    resultados = []
+    for valores in matriz.T:
+        X, Y = janelas_defasagem(valores, dimensao, horizonte)
+
+        # Validação: modelo sem as últimas `validacao` janelas, erro do passo 1
+        modelo = Ridge(alpha=alpha).fit(X[:-validacao], Y[:-validacao])
+        erros = modelo.predict(X[-validacao:])[:, 0] - Y[-validacao:, 0]
+
+        # Previsão: modelo com todas as janelas, a partir dos últimos `dimensao` dias
+        modelo = Ridge(alpha=alpha).fit(X, Y)
+        ultima = valores[-dimensao:][::-1].reshape(1, -1)
+        previsao = np.clip(modelo.predict(ultima)[0], 0, None)
+
+        resultados.append({
+            'previsao': previsao.tolist(),
+            'mae': float(np.mean(np.abs(erros))),
+            'rmse': float(np.sqrt(np.mean(erros ** 2))),
+        })
+    return resultados
+
+
+@medir('prever_bairros')
+def prever_bairros(cubo, inicio=None, fim=None, parametros=None, n_jobs=-1, lotes=None):
+    """
+    Previsão dos próximos dias para todos os bairros: uma matriz densa com as
+    séries de todos os bairros e um modelo leve por bairro, ajustados em paralelo.
+
+    Parâmetros:
+    - cubo, inicio, fim: como em matriz_bairros
+    - parametros: substitui valores de PARAMETROS_BAIRROS
+    - n_jobs: processos usados, como no joblib
+    - lotes: número de lotes de bairros enviados aos processos (padrão: 4 por núcleo)
+
+    Retorna:
+    - dicionário {bairro: {'datas', 'previsao', 'mae', 'rmse'}}
+    """
+    parametros = {**PARAMETROS_BAIRROS, **(parametros or {})}
+    datas, bairros, matriz = matriz_bairros(cubo, inicio, fim)
+    if not bairros:
+        print('Nenhum bairro com acidentes no intervalo')
+        registrar_linhas('prever_bairros', 0)
+        return {}
+
+    minimo = parametros['dimensao'] + parametros['horizonte'] + parametros['validacao']
+    if len(datas) < minimo:
+        raise ValueError(f"São necessários pelo menos {minimo} dias; a série tem {len(datas)}.")
+
+    # Bairros agrupados em lotes para que cada tarefa tenha trabalho suficiente
+    if lotes is None:
+        lotes = 4 * (os.cpu_count() or 1)
+    cortes = np.array_split(np.arange(len(bairros)), min(lotes, len(bairros)))
+    resultados = Parallel(n_jobs=n_jobs)(
+        delayed(_prever_bairros)(matriz[:, corte], parametros['dimensao'], parametros['horizonte'],
+                                 parametros['validacao'], parametros['alpha'])
+        for corte in cortes
+    )
+
+    proximas = pd.date_range(datas[-1] + pd.Timedelta(days=1), periods=parametros['horizonte'], freq='D')
+    proximas = [d.strftime('%Y-%m-%d') for d in proximas]
+
+    previsoes = {}
+    for corte, lote in zip(cortes, resultados):
+        for indice, resultado in zip(corte, lote):
+            previsoes[bairros[indice]] = {'datas': proximas, **resultado}
+    print(f'Previsões geradas para {len(previsoes)} bairros')
+    registrar_linhas('prever_bairros', len(previsoes))
+    return previsoes
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.cache_dados import PASTA_CACHE
+from src.metricas import registrar_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+PASTA_MODELOS = os.path.join(PASTA_CACHE, 'modelos')
+
+# Versões mantidas por modelo; as mais antigas são apagadas ao salvar uma nova
+VERSOES_MANTIDAS = 5
+
+
+def hash_serie(serie):
+    """
+    Retorna um hash do índice (datas) e dos valores da série de treino.
+    """
+    linhas = pd.util.hash_pandas_object(serie.astype(float), index=True)
+    return hashlib.sha256(linhas.to_numpy().tobytes()).hexdigest()
+
+
+def versao_modelo(serie, parametros):
+    """
+    Versão de um modelo: muda quando a série de treino ou os hiperparâmetros mudam.
+    """
+    h = hashlib.sha256()
+    h.update(hash_serie(serie).encode('utf-8'))
+    h.update(json.dumps(parametros, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def _caminhos(nome, versao, pasta):
+    base = os.path.join(pasta, f'{nome}-{versao}')
+    return base + '.joblib', base + '.json'
+
+
+def _para_json(valor):
+    if isinstance(valor, (np.integer, np.floating)):
+        return valor.item()
+    return valor
+
+
+@contextmanager
+def _trava(nome, pasta):
+    # Trava exclusiva por modelo, compartilhada entre os workers do gunicorn
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, f'{nome}.lock'), 'w') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def carregar_modelo(nome, versao, pasta=PASTA_MODELOS):
+    """
+    Lê o resultado salvo de um modelo.
+
+    Retorna:
+    - (resultado, metadados) ou None se a versão não estiver no registro
+    """
+    artefato, meta = _caminhos(nome, versao, pasta)
+    if not (os.path.exists(meta) and os.path.exists(artefato)):
+        return None
+    try:
+        import joblib
+        with open(meta, encoding='utf-8') as f:
+            metadados = json.load(f)
+        return joblib.load(artefato), metadados
+    except Exception as e:
+        print(f'Erro ao ler modelo {nome}-{versao}: {e}')
+        return None
+
+
+def salvar_modelo(nome, versao, resultado, metadados, pasta=PASTA_MODELOS):
+    """
+    Grava o resultado do modelo (joblib) e os metadados (JSON) de forma atômica
+    e apaga as versões mais antigas além de VERSOES_MANTIDAS.
+    """
+    import joblib
+    os.makedirs(pasta, exist_ok=True)
+    artefato, meta = _caminhos(nome, versao, pasta)
+
+    tmp = artefato + '.tmp'
+    joblib.dump(resultado, tmp)
+    os.replace(tmp, artefato)
+
+    # O .json é gravado por último: sem ele a versão é considerada incompleta
+    tmp = meta + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(metadados, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, meta)
+
+    versoes = sorted(
+        (n for n in os.listdir(pasta) if n.startswith(f'{nome}-') and n.endswith('.json')),
+        key=lambda n: os.path.getmtime(os.path.join(pasta, n)),
+        reverse=True,
+    )
+    for antigo in versoes[VERSOES_MANTIDAS:]:
+        for caminho in _caminhos(nome, antigo[len(nome) + 1:-len('.json')], pasta):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+
+def obter_modelo(nome, serie, treinar, parametros, pasta=PASTA_MODELOS, forcar=False):
+    """
+    Devolve o resultado do modelo para a série, treinando só se a versão
+    (hash da série + hiperparâmetros) ainda não estiver no registro.
+
+    Com vários processos, só um treina: os demais esperam a trava e leem o
+    modelo que ele salvou.
+
+    Parâmetros:
+    - nome: nome do modelo no registro (ex.: 'svr')
+    - serie: Series de treino
+    - treinar: função que recebe a série e retorna o dicionário de resultado
+      (com as métricas mae, mse, rmse, mape)
+    - parametros: hiperparâmetros, gravados nos metadados e parte da versão
+    - forcar: treina mesmo se a versão já existir
+
+    Retorna:
+    - (resultado, metadados)
+    """
+    versao = versao_modelo(serie, parametros)
+
+    if not forcar:
+        salvo = carregar_modelo(nome, versao, pasta)
+        registrar_cache('registro_modelos', salvo is not None)
+        if salvo is not None:
+            print(f'Modelo {nome}-{versao} carregado do registro')
+            return salvo
+
+    with _trava(nome, pasta):
+        # Outro processo pode ter treinado enquanto esperávamos a trava
+        if not forcar:
+            salvo = carregar_modelo(nome, versao, pasta)
+            if salvo is not None:
+                print(f'Modelo {nome}-{versao} carregado do registro')
+                return salvo
+
+        print(f'Treinando modelo {nome}-{versao}...')
+        inicio = time.perf_counter()
+        resultado = treinar(serie)
+        duracao = time.perf_counter() - inicio
+
+        metadados = {
+            'nome': nome,
+            'versao': versao,
+            'hash_serie': hash_serie(serie),
+            'inicio_serie': str(serie.index[0]) if len(serie) else None,
+            'fim_serie': str(serie.index[-1]) if len(serie) else None,
+            'observacoes': int(len(serie)),
+            'parametros': parametros,
+            'metricas': {m: _para_json(resultado[m]) for m in ('mae', 'mse', 'rmse', 'mape') if m in resultado},
+            'tempo_treino_s': round(duracao, 3),
+            'treinado_em': datetime.now().isoformat(timespec='seconds'),
+        }
+        salvar_modelo(nome, versao, resultado, metadados, pasta)
+        print(f'Modelo {nome}-{versao} treinado em {duracao:.1f}s e salvo no registro')
+
+    return resultado, metadados
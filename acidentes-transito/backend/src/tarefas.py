@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from src.cache_dados import PASTA_CACHE
+
+try:
+    import fcntl
+except ImportError:  # Windows: deduplicação só dentro do processo
+    fcntl = None
+
+# O estado de cada tarefa também é gravado em disco, para que qualquer worker
+# (gunicorn com vários processos) responda o status de uma tarefa de outro
+PASTA_TAREFAS = os.path.join(PASTA_CACHE, 'tarefas')
+
+# Tarefas concluídas guardadas para consulta de status; as mais antigas são descartadas
+TAREFAS_MANTIDAS = 50
+
+_trava = threading.Lock()
+_executor = None
+_tarefas = {}
+_ativas = {}
+_travas_tipo = {}   # tipo -> arquivo aberto que segura a trava entre processos
+
+
+def _apos_fork():
+    # O processo filho herda a referência ao executor, mas não a thread dele
+    global _trava, _executor
+    _trava = threading.Lock()
+    _executor = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+
+def _agora():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _obter_executor():
+    # Criado sob demanda no processo que o usa (ver _apos_fork)
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tarefa')
+    return _executor
+
+
+def _arquivo(id_tarefa):
+    return os.path.join(PASTA_TAREFAS, f'{id_tarefa}.json')
+
+
+def _gravar(tarefa):
+    try:
+        os.makedirs(PASTA_TAREFAS, exist_ok=True)
+        temporario = f'{_arquivo(tarefa["id"])}.{os.getpid()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(tarefa, f, default=str)
+        os.replace(temporario, _arquivo(tarefa['id']))
+    except OSError as e:
+        print(f'Erro ao gravar estado da tarefa {tarefa["id"]}: {e}')
+
+
+@contextmanager
+def _trava_registro(tipo):
+    # Serializa, entre os workers, a verificação da trava do tipo e a gravação
+    # do id: quem encontra a trava ocupada sempre lê o id já gravado
+    with open(os.path.join(PASTA_TAREFAS, f'{tipo}.registro.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _reservar_tipo(tarefa):
+    """
+    Tenta a trava do tipo da tarefa, compartilhada entre os workers do
+    gunicorn, e grava o estado inicial da tarefa. A trava fica com o processo
+    que executa a tarefa até o fim da execução (ou até ele morrer, quando o
+    sistema a libera).
+
+    Retorna:
+    - None se a trava foi obtida; senão, o id da tarefa que a segura
+    """
+    tipo = tarefa['tipo']
+    if fcntl is None:
+        _gravar(tarefa)
+        return None
+    os.makedirs(PASTA_TAREFAS, exist_ok=True)
+    with _trava_registro(tipo):
+        f = open(os.path.join(PASTA_TAREFAS, f'{tipo}.lock'), 'a+')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.seek(0)
+            id_existente = f.read().strip()
+            f.close()
+            return id_existente
+        f.seek(0)
+        f.truncate()
+        f.write(tarefa['id'])
+        f.flush()
+        # Gravado antes de liberar o registro: outro worker que receber este
+        # id já encontra o estado em disco
+        _gravar(tarefa)
+    _travas_tipo[tipo] = f
+    return None
+
+
+def _liberar_tipo(tipo):
+    f = _travas_tipo.pop(tipo, None)
+    if f is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+
+
+def _descartar_antigas():
+    concluidas = [i for i, t in _tarefas.items() if t['status'] in ('concluida', 'erro')]
+    for id_tarefa in concluidas[:max(len(concluidas) - TAREFAS_MANTIDAS, 0)]:
+        del _tarefas[id_tarefa]
+        try:
+            os.remove(_arquivo(id_tarefa))
+        except OSError:
+            pass
+
+
+def _executar(id_tarefa, tipo, funcao):
+    with _trava:
+        _tarefas[id_tarefa].update(status='executando', iniciada_em=_agora())
+        _gravar(_tarefas[id_tarefa])
+    try:
+        resultado = funcao()
+        atualizacao = {'status': 'concluida', 'resultado': resultado}
+    except Exception as e:
+        traceback.print_exc()
+        atualizacao = {'status': 'erro', 'erro': str(e)}
+    with _trava:
+        _tarefas[id_tarefa].update(concluida_em=_agora(), **atualizacao)
+        _gravar(_tarefas[id_tarefa])
+        _ativas.pop(tipo, None)
+        _liberar_tipo(tipo)
+        _descartar_antigas()
+
+
+def iniciar_tarefa(tipo, funcao):
+    """
+    Agenda `funcao` para rodar em segundo plano. Se já houver uma tarefa do
+    mesmo tipo pendente ou em execução, neste ou em outro worker (trava em
+    arquivo na pasta de tarefas), nenhuma nova é criada e o id da existente é
+    devolvido (chamadas concorrentes compartilham a mesma tarefa).
+
+    Parâmetros:
+    - tipo: nome da tarefa (ex.: 'retrain')
+    - funcao: função sem argumentos; o retorno fica em 'resultado' e deve ser
+      serializável em JSON
+
+    Retorna:
+    - (id da tarefa, True se foi criada agora)
+    """
+    with _trava:
+        if tipo in _ativas:
+            return _ativas[tipo], False
+        id_tarefa = uuid.uuid4().hex
+        tarefa = {'id': id_tarefa, 'tipo': tipo, 'status': 'pendente', 'criada_em': _agora()}
+        id_existente = _reservar_tipo(tarefa)
+        if id_existente is not None:
+            return id_existente, False
+        _tarefas[id_tarefa] = tarefa
+        _ativas[tipo] = id_tarefa
+    _obter_executor().submit(_executar, id_tarefa, tipo, funcao)
+    return id_tarefa, True
+
+
+def status_tarefa(id_tarefa):
+    """
+    Retorna uma cópia do estado da tarefa (status, datas, resultado ou erro),
+    ou None se o id não existir. Tarefas de outros processos são lidas do disco.
+    """
+    with _trava:
+        tarefa = _tarefas.get(id_tarefa)
+        if tarefa is not None:
+            return dict(tarefa)
+    if not all(c in '0123456789abcdef' for c in id_tarefa):
+        return None
+    try:
+        with open(_arquivo(id_tarefa), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
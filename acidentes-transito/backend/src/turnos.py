@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+# Hora inicial (inclusive) de cada turno, em ordem crescente. As horas antes
+# do primeiro limite pertencem ao último turno (Madrugada vai das 21h às 5h).
+TURNOS_PADRAO = [(5, 'Manhã'), (12, 'Tarde'), (17, 'Noite'), (21, 'Madrugada')]
+INDEFINIDO = 'Indefinido'
+
+# Ordem usada nos gráficos
+ORDEM_TURNOS = ['Madrugada', 'Manhã', 'Tarde', 'Noite', INDEFINIDO]
+
+
+def extrair_horas(valores):
+    """
+    Extrai a hora (0 a 23) do início de cada texto ('11:36:00' -> 11).
+
+    Parâmetros:
+    - valores: Series com os horários em texto
+
+    Retorna:
+    - Series float com a hora, NaN quando vazia, inválida ou fora de 0-23
+    """
+    if valores.dtype != object:
+        return pd.Series(np.nan, index=valores.index, dtype=float)
+    horas = valores.str.strip().str.extract(r'^(\d{1,2})', expand=False)
+    horas = pd.to_numeric(horas, errors='coerce').astype(float)
+    return horas.where((horas >= 0) & (horas <= 23))
+
+
+def classificar_turnos(horas, limites=TURNOS_PADRAO):
+    """
+    Classifica cada hora em um turno.
+
+    Parâmetros:
+    - horas: Series numérica com a hora (ex.: saída de extrair_horas)
+    - limites: lista de (hora inicial, turno) em ordem crescente
+
+    Retorna:
+    - Series com o nome do turno; 'Indefinido' quando a hora é nula
+    """
+    inicios = np.array([inicio for inicio, _ in limites], dtype=float)
+    nomes = np.array([nome for _, nome in limites], dtype=object)
+
+    h = pd.to_numeric(horas, errors='coerce').astype(float).to_numpy()
+    nulas = np.isnan(h)
+    # Índice -1 (antes do primeiro limite) cai no último turno
+    posicoes = np.searchsorted(inicios, np.where(nulas, 0, h), side='right') - 1
+    turnos = np.where(nulas, INDEFINIDO, nomes[posicoes])
+    return pd.Series(turnos, index=horas.index, dtype=object)
+
+
+def extrair_hora(valor):
+    """Versão para um único valor de extrair_horas."""
+    return extrair_horas(pd.Series([valor], dtype=object)).iloc[0]
+
+
+def classificar_turno(hora, limites=TURNOS_PADRAO):
+    """Versão para um único valor de classificar_turnos."""
+    return classificar_turnos(pd.Series([hora], dtype=object), limites).iloc[0]
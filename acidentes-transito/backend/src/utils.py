@@ -1,79 +1,123 @@
 import re
+from itertools import chain
 import numpy as np
 import pandas as pd
-from src.funcoes_eda import classificar_turno
-from wordcloud import WordCloud
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-import nltk
+from src.turnos import extrair_hora, extrair_horas, classificar_turnos  # extrair_hora segue disponível em src.utils
+from src.datas import unificar_datas
+from src.esquema import COLUNAS_CONTAGEM, padronizar_texto
+from src.metricas import medir
+from src.nltk_local import stopwords_portugues, word_tokenize, regex_contracoes
 import unidecode
-nltk.download('punkt')
-nltk.download('stopwords')
 
-def tratamento(df):
+def _sem_acento(valor):
+    return unidecode.unidecode(valor).strip() if isinstance(valor, str) else valor
+
+def tratamento(df, categorico=False):
     """
     Limpa e padroniza nomes de colunas e campos textuais sem alterar o case:
     - Remove acentos e espaços dos nomes de colunas
     - Limpa colunas texto (remove acentos, espaços extras)
+
+    Cada coluna é limpa pelos seus valores distintos (bairro, natureza, tipo...
+    têm poucas dezenas ou centenas) e o resultado é mapeado de volta às linhas.
+    Com categorico=True as colunas texto são devolvidas como 'category'.
     """
     df.columns = [unidecode.unidecode(col).strip().replace(' ', '_') for col in df.columns]
     
     for col in df.select_dtypes(include='object').columns:
-        df[col] = df[col].apply(lambda x: unidecode.unidecode(x).strip() if isinstance(x, str) else x)
+        codigos, unicos = pd.factorize(df[col])
+        limpos = pd.Index([_sem_acento(x) for x in unicos], dtype=object)
+        if categorico:
+            # Valores que viram o mesmo texto depois de limpos (ex.: 'SÃO' e 'SAO ')
+            # passam a ser uma única categoria
+            categorias = pd.unique(limpos[pd.notna(limpos)])
+            valores = pd.Categorical(limpos, categories=categorias).take(codigos, allow_fill=True)
+            df[col] = pd.Series(valores, index=df.index)
+        else:
+            valores = limpos.take(codigos, allow_fill=True, fill_value=np.nan)
+            df[col] = pd.Series(valores, index=df.index, dtype=object)
 
     return df
 
 
-def extrair_hora(valor):
-    if pd.isna(valor):
-        return np.nan
-    if isinstance(valor, str):
-        valor = valor.strip()
-        match = re.match(r'^(\d{1,2})', str(valor))  
-        if match:
-            h = int(match.group(1))
-            return h if 0 <= h <= 23 else np.nan
-    return np.nan
+_REGEX_DESCRICAO = re.compile(r'[^a-zA-ZáéíóúãõâêôçÀ-ÿ\s]')
 
 def limpar_descricao(texto):
 
     texto = texto.lower()
-    texto = re.sub(r'[^a-zA-ZáéíóúãõâêôçÀ-ÿ\s]', '', texto)
+    texto = _REGEX_DESCRICAO.sub('', texto)
     
     tokens = word_tokenize(texto)
     
-    stop_words = set(stopwords.words('portuguese'))
+    stop_words = stopwords_portugues()
     tokens = [t for t in tokens if t not in stop_words and len(t) > 2]
     
     return ' '.join(tokens)     
 
-def tratar_dados(df):
-    df['data_dt'] = pd.to_datetime(df['data'], errors='coerce', dayfirst=True)
-    mask = df['data_dt'].isna() & df['data'].notna()
-    df.loc[mask, 'data_dt'] = pd.to_datetime(df.loc[mask, 'data'], errors='coerce', dayfirst=False)
+def _separar_contracoes(token):
+    # Mesmo tratamento que o NLTKWordTokenizer aplica às contrações (cannot -> can not)
+    texto = ' ' + token + ' '
+    for regexp in regex_contracoes():
+        texto = regexp.sub(r' \1 \2 ', texto)
+    return texto.split()
 
-    df['DATA_dt'] = pd.to_datetime(df['DATA'], errors='coerce', dayfirst=True)
-    mask2 = df['DATA_dt'].isna() & df['DATA'].notna()
-    df.loc[mask2, 'DATA_dt'] = pd.to_datetime(df.loc[mask2, 'DATA'], errors='coerce', dayfirst=False)
+def limpar_descricoes(textos):
+    """
+    Versão em lote de limpar_descricao: processa a coluna inteira de uma vez
+    e retorna o mesmo resultado que aplicar limpar_descricao linha a linha.
+
+    Parâmetros:
+    - textos: Series de strings (sem nulos)
+
+    Retorna:
+    - Series com as descrições limpas, no mesmo índice
+    """
+    listas = textos.str.lower().str.replace(_REGEX_DESCRICAO, '', regex=True).str.split()
 
-    df['data_unificada'] = df['data_dt']
-    mask3 = df['data_unificada'].isna()
-    df.loc[mask3, 'data_unificada'] = df.loc[mask3, 'DATA_dt']
+    # Sem pontuação, word_tokenize só quebra nos espaços e separa as contrações do
+    # inglês; elas são resolvidas uma vez por token distinto
+    distintos = set(chain.from_iterable(listas))
+    if not distintos:
+        # Sem nenhuma palavra (ex.: coluna ausente na leitura em blocos): as
+        # stopwords nem precisam ser carregadas
+        return pd.Series('', index=textos.index, dtype=object)
+    contracoes = {}
+    for token in distintos:
+        partes = _separar_contracoes(token)
+        if partes != [token]:
+            contracoes[token] = partes
+    if contracoes:
+        listas = [[p for t in tokens for p in contracoes.get(t, (t,))] for tokens in listas]
+
+    stop_words = stopwords_portugues()
+    limpos = [' '.join([t for t in tokens if t not in stop_words and len(t) > 2]) for tokens in listas]
+    return pd.Series(limpos, index=textos.index, dtype=object)
+
+def _coluna(df, nome):
+    # Os arquivos anuais não têm todas as colunas; as ausentes são tratadas como vazias
+    if nome in df.columns:
+        return df[nome]
+    return pd.Series(np.nan, index=df.index, dtype=object)
+
+@medir('tratar_dados')
+def tratar_dados(df):
+    df['data_unificada'] = unificar_datas(df)
 
     df['ano'] = df['data_unificada'].dt.year.astype('Int64')  
     df['mes'] = df['data_unificada'].dt.month.astype('Int64')
     df['dia_semana'] = df['data_unificada'].dt.dayofweek.astype('Int64')
 
     df['dia_nome'] = df['dia_semana'].map({0: 'Seg', 1: 'Ter', 2: 'Qua', 3: 'Qui', 4: 'Sex', 5: 'Sáb', 6: 'Dom'})
-    df['turno'] = df['hora'].apply(classificar_turno) 
-    df['hora_limpa'] = df['hora'].apply(extrair_hora)  
+    df['hora_limpa'] = extrair_horas(_coluna(df, 'hora'))
+    df['turno'] = classificar_turnos(df['hora_limpa'])
 
-    df['descricao'] = df['descricao'].fillna('')
-    df['descricao_limpa'] = df['descricao'].apply(limpar_descricao)
+    df['descricao'] = _coluna(df, 'descricao').fillna('')
+    df['descricao_limpa'] = limpar_descricoes(df['descricao'])
 
-    tipo_veiculos = ['auto', 'moto', 'ciclom', 'ciclista', 'pedestre', 'onibus', 'caminhao', 'viatura', 'outros']
-    for col in tipo_veiculos + ['vitimas', 'vitimasfatais']:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    for col in COLUNAS_CONTAGEM:
+        df[col] = pd.to_numeric(_coluna(df, col), errors='coerce').fillna(0)
 
-    return df
+    # Um tipo por coluna: a partição gravada em cache volta igual a este df
+    padronizar_texto(df)
 
+    return df
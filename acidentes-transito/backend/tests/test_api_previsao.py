@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+import app as aplicacao
+
+
+def _resultado(deslocamento=0.0):
+    return {
+        'previsao': [10.2 + deslocamento, 11.7, 9.4, 12.0, 13.5, 8.9],
+        'mae': 1.23456, 'mse': 2.5, 'rmse': 1.5811, 'mape': 12.345,
+    }
+
+
+@pytest.fixture
+def cliente(monkeypatch, tmp_path):
+    # Modelo servido montado direto, sem aquecimento nem modelo publicado em disco
+    serie = pd.Series(range(10), index=pd.date_range('2024-12-22', periods=10, freq='D'), dtype=float)
+    monkeypatch.setattr(aplicacao, '_aquecido', True)
+    monkeypatch.setattr(aplicacao, '_gravacao_pendente', False)
+    monkeypatch.setattr(aplicacao, 'ARQUIVO_MODELO_SERVIDO', str(tmp_path / 'modelo_servido.joblib'))
+    monkeypatch.setattr(aplicacao, 'modelo_atual', aplicacao.montar_modelo(serie, _resultado(), None, {}))
+    return aplicacao.create_app(aquecer_agora=False).test_client(), serie
+
+
+@pytest.mark.parametrize('rota', ['/api/previsao', '/api/avaliacao'])
+def test_etag_e_304(cliente, rota):
+    cliente, _ = cliente
+    resposta = cliente.get(rota)
+    assert resposta.status_code == 200
+    etag = resposta.headers['ETag']
+    assert resposta.headers['Cache-Control'] == aplicacao.CACHE_CONTROL_MODELO
+
+    revalidada = cliente.get(rota, headers={'If-None-Match': etag})
+    assert revalidada.status_code == 304
+    assert revalidada.data == b''
+    assert revalidada.headers['ETag'] == etag
+
+    assert cliente.get(rota, headers={'If-None-Match': '"outra-versao"'}).status_code == 200
+
+
+def test_corpo_da_previsao(cliente):
+    cliente, _ = cliente
+    dados = cliente.get('/api/previsao').get_json()
+    assert dados['previsao_proximo_dia'] == 10
+    assert [p['data'] for p in dados['previsoes_proximos_6_dias']][:2] == ['2025-01-01', '2025-01-02']
+    assert cliente.get('/api/avaliacao').get_json() == {'MAE': 1.2346, 'MSE': 2.5, 'RMSE': 1.5811, 'MAPE (%)': 12.35}
+
+
+def test_novo_modelo_muda_o_etag(cliente, monkeypatch):
+    cliente, serie = cliente
+    etag = cliente.get('/api/previsao').headers['ETag']
+
+    monkeypatch.setattr(aplicacao, 'modelo_atual', aplicacao.montar_modelo(serie, _resultado(5.0), None, {}))
+    resposta = cliente.get('/api/previsao', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+    assert resposta.get_json()['previsao_proximo_dia'] == 15
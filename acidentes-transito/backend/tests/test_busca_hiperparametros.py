@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.busca_hiperparametros import buscar_hiperparametros, avaliar_svr
+
+CHAMADAS = []
+
+
+def avaliar_constante(y_train, y_eval, valor=0.0, ordem=(1, 0, 0)):
+    # Avaliador de teste: prevê sempre `valor`; no nível do módulo, como a busca exige
+    CHAMADAS.append((valor, ordem))
+    return np.full(len(y_eval), float(valor))
+
+
+@pytest.fixture
+def serie():
+    CHAMADAS.clear()
+    return pd.Series(5.0, index=pd.date_range('2024-01-01', periods=100, freq='D'))
+
+
+def test_melhor_candidato_e_teste(serie, tmp_path):
+    r = buscar_hiperparametros(serie, avaliar_constante, {'valor': [0, 5, 10]}, pasta=str(tmp_path))
+    assert r['melhores_params'] == {'valor': 5}
+    assert r['melhor_mae_val'] == 0.0 and r['mae_test'] == 0.0
+    assert len(r['resultados']) == 3 and not r['interrompida']
+
+
+def test_cache_reaproveita_avaliacoes_e_tipos(serie, tmp_path):
+    espaco = {'valor': [4, 5], 'ordem': [(1, 0, 1), (2, 0, 0)]}
+    novo = buscar_hiperparametros(serie, avaliar_constante, espaco, pasta=str(tmp_path))
+    assert len(CHAMADAS) == 4 + 1  # candidatos + teste do melhor
+
+    CHAMADAS.clear()
+    cache = buscar_hiperparametros(serie, avaliar_constante, espaco, pasta=str(tmp_path))
+    assert len(CHAMADAS) == 1  # só o teste do melhor
+    assert cache['melhores_params'] == novo['melhores_params']
+    assert isinstance(cache['melhores_params']['ordem'], tuple)
+    assert cache['resultados']['params'].tolist() == novo['resultados']['params'].tolist()
+
+    CHAMADAS.clear()
+    buscar_hiperparametros(serie, avaliar_constante, espaco, usar_cache=False, pasta=str(tmp_path))
+    assert len(CHAMADAS) == 5
+
+
+def test_parada_por_paciencia(serie, tmp_path):
+    r = buscar_hiperparametros(serie, avaliar_constante, {'valor': [5, 0, 1, 2, 3, 4]}, paciencia=2,
+                               usar_cache=False, pasta=str(tmp_path))
+    assert r['interrompida']
+    assert [p['valor'] for p in r['resultados']['params']] == [5, 0, 1]
+    assert r['melhores_params'] == {'valor': 5}
+
+
+def test_avaliador_proprio_exige_espaco(serie, tmp_path):
+    with pytest.raises(ValueError):
+        buscar_hiperparametros(serie, avaliar_constante, pasta=str(tmp_path))
+
+
+def test_avaliar_svr_uma_coluna_por_passo():
+    valores = np.sin(np.arange(120) / 5.0) + 2
+    previsto = avaliar_svr(pd.Series(valores[:100]), pd.Series(valores[100:]), stepahead=3)
+    assert previsto.shape == (20, 3)
+    assert np.all(np.isfinite(previsto))
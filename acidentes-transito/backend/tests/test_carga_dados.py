@@ -0,0 +1,149 @@
+import os
+from functools import partial
+import pytest
+from src import cache_dados, carga_dados
+from src.carga_dados import carregar_base
+
+CABECALHO = 'data;hora;natureza_acidente;bairro;tipo;descricao;auto;moto;vitimas\n'
+
+
+def _escrever(caminho, linhas):
+    with open(caminho, 'w', encoding='latin1') as f:
+        f.write(CABECALHO)
+        for linha in linhas:
+            f.write(linha + '\n')
+
+
+@pytest.fixture
+def pastas(monkeypatch, tmp_path):
+    csvs = tmp_path / 'csvs'
+    cache = tmp_path / 'cache'
+    csvs.mkdir()
+    _escrever(csvs / 'acidentes2019.csv', [
+        '2019-01-01;08:10:00;SEM VÍTIMA;IPSEP;COLISÃO;carro bateu no poste;1;0;0',
+        '2019-01-02;18:30:00;COM VÍTIMA;DERBY;ATROPELAMENTO;pedestre atingido;1;0;1',
+    ])
+    _escrever(csvs / 'acidentes2020.csv', [
+        '2020-03-05;23:00:00;SEM VÍTIMA;IPSEP;CHOQUE;moto derrapou na pista;0;1;0',
+    ])
+    _escrever(csvs / 'acidentes2021.csv', [
+        '2021-07-04;12:00:00;SEM VÍTIMA;DERBY;COLISÃO;;2;0;0',
+        '2021-07-05;06:45:00;COM VÍTIMA;BOA VIAGEM;COLISÃO;;1;1;2',
+    ])
+    monkeypatch.setattr(carga_dados, 'PASTA_CSVS', str(csvs))
+
+    # Snapshot, manifesto e partições na pasta temporária
+    particoes = str(cache / 'particoes')
+    manifesto = str(cache / 'manifesto.json')
+    monkeypatch.setattr(carga_dados, 'carregar_snapshot', partial(cache_dados.carregar_snapshot, pasta=str(cache)))
+    monkeypatch.setattr(carga_dados, 'salvar_snapshot', partial(cache_dados.salvar_snapshot, pasta=str(cache)))
+    monkeypatch.setattr(carga_dados, 'carregar_manifesto', partial(cache_dados.carregar_manifesto, caminho=manifesto))
+    monkeypatch.setattr(carga_dados, 'salvar_manifesto',
+                        partial(cache_dados.salvar_manifesto, caminho=manifesto, pasta=particoes))
+    monkeypatch.setattr(carga_dados, 'carregar_particao', partial(cache_dados.carregar_particao, pasta=particoes))
+    monkeypatch.setattr(carga_dados, 'salvar_particao', partial(cache_dados.salvar_particao, pasta=particoes))
+
+    # Registra os arquivos lidos e tratados de fato (sem cache)
+    lidos = []
+    ler_original = carga_dados.ler_arquivo
+
+    def ler_arquivo(arquivo):
+        lidos.append(os.path.basename(arquivo))
+        return ler_original(arquivo)
+
+    monkeypatch.setattr(carga_dados, 'ler_arquivo', ler_arquivo)
+    return csvs, cache, lidos
+
+
+def _snapshots(cache):
+    if not os.path.isdir(cache):
+        return []
+    return sorted(n for n in os.listdir(cache) if n.startswith('snapshot-') and n.endswith('.json'))
+
+
+def test_snapshot_reaproveitado(pastas):
+    csvs, cache, lidos = pastas
+    df, cubo = carregar_base(tamanho_bloco=None)
+    assert len(df) == 5 and len(lidos) == 3
+    assert len(_snapshots(cache)) == 1
+
+    lidos.clear()
+    df_cache, cubo_cache = carregar_base(tamanho_bloco=None)
+    assert lidos == []
+    assert df_cache.equals(df) and cubo_cache.equals(cubo)
+
+
+def test_csv_alterado_invalida_o_snapshot(pastas):
+    csvs, cache, lidos = pastas
+    carregar_base(tamanho_bloco=None)
+    antigo = _snapshots(cache)
+
+    _escrever(csvs / 'acidentes2020.csv', [
+        '2020-03-05;23:00:00;SEM VÍTIMA;IPSEP;CHOQUE;moto derrapou na pista;0;1;0',
+        '2020-03-06;10:00:00;SEM VÍTIMA;IPSEP;CHOQUE;;1;0;0',
+    ])
+    lidos.clear()
+    df, _ = carregar_base(tamanho_bloco=None)
+    assert len(df) == 6
+    assert _snapshots(cache) != antigo and len(_snapshots(cache)) == 1
+
+
+def test_falha_de_leitura_nao_salva_snapshot(pastas, monkeypatch):
+    csvs, cache, lidos = pastas
+    ler_arquivo = carga_dados.ler_arquivo
+
+    def falha_em_2020(arquivo):
+        if arquivo.endswith('acidentes2020.csv'):
+            raise ValueError('arquivo corrompido')
+        return ler_arquivo(arquivo)
+
+    monkeypatch.setattr(carga_dados, 'ler_arquivo', falha_em_2020)
+    df, _ = carregar_base(tamanho_bloco=None)
+    assert len(df) == 4
+    assert _snapshots(cache) == []
+
+    # Na carga seguinte a base completa é montada e o snapshot salvo
+    monkeypatch.setattr(carga_dados, 'ler_arquivo', ler_arquivo)
+    lidos.clear()
+    df, _ = carregar_base(tamanho_bloco=None)
+    assert len(df) == 5
+    assert len(_snapshots(cache)) == 1
+
+
+def test_so_arquivos_alterados_sao_relidos(pastas):
+    csvs, cache, lidos = pastas
+    df_inicial, _ = carregar_base(tamanho_bloco=None)
+
+    _escrever(csvs / 'acidentes2022.csv', ['2022-01-10;09:00:00;SEM VÍTIMA;DERBY;COLISÃO;;1;0;0'])
+    lidos.clear()
+    df, _ = carregar_base(tamanho_bloco=None)
+    assert lidos == ['acidentes2022.csv']
+    assert len(df) == 6
+    # As partições em cache voltam iguais às recém-tratadas
+    assert df.iloc[:5].reset_index(drop=True).equals(df_inicial)
+
+
+def test_csv_removido_sai_do_manifesto(pastas):
+    csvs, cache, lidos = pastas
+    carregar_base(tamanho_bloco=None)
+    assert len(os.listdir(cache / 'particoes')) == 3
+
+    os.remove(csvs / 'acidentes2019.csv')
+    lidos.clear()
+    df, _ = carregar_base(tamanho_bloco=None)
+    assert lidos == [] and len(df) == 3
+    assert len(os.listdir(cache / 'particoes')) == 2
+    assert not any(a.endswith('acidentes2019.csv') for a in carga_dados.carregar_manifesto())
+
+
+def test_recurso_do_nltk_ausente_interrompe_a_carga(pastas, monkeypatch):
+    csvs, cache, lidos = pastas
+    from src import utils
+
+    def sem_stopwords():
+        raise LookupError("Recurso do NLTK 'stopwords' não encontrado")
+
+    monkeypatch.setattr(utils, 'stopwords_portugues', sem_stopwords)
+    with pytest.raises(LookupError):
+        carregar_base(tamanho_bloco=None)
+    assert _snapshots(cache) == []
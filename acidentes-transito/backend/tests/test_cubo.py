@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.cubo import construir_cubo, combinar_cubos, graficos_do_cubo, serie_diaria, DIMENSOES_CUBO
+from src.esquema import compactar, COLUNAS_CONTAGEM, COLUNAS_VEICULOS, COLUNAS_VITIMAS
+from src.turnos import classificar_turnos
+
+
+@pytest.fixture
+def df_tratado():
+    # Mesmas colunas que tratar_dados produz e o cubo usa, com nulos nas dimensões e na hora
+    rng = np.random.RandomState(0)
+    n = 3000
+    df = pd.DataFrame({
+        'data_unificada': pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.randint(0, 900, n), unit='D')
+                          + pd.to_timedelta(rng.randint(0, 24, n), unit='h'),
+        'bairro': rng.choice(['BOA VIAGEM', 'IMBIRIBEIRA', 'DERBY', 'CASA AMARELA', None], n),
+        'natureza_acidente': rng.choice(['COM VÍTIMA', 'SEM VÍTIMA', None], n),
+        'tipo': rng.choice(['COLISÃO', 'CHOQUE', 'ATROPELAMENTO', 'CAPOTAMENTO'], n),
+    })
+    hora = pd.Series(rng.randint(0, 24, n), dtype=float)
+    hora[rng.rand(n) < 0.05] = np.nan
+    df['hora_limpa'] = hora
+    df['turno'] = classificar_turnos(hora)
+    for col in COLUNAS_CONTAGEM:
+        df[col] = rng.randint(0, 3, n).astype(float)
+    return compactar(df)
+
+
+def _ordenado(cubo):
+    dimensoes = list(DIMENSOES_CUBO)
+    cubo = cubo.copy()
+    for d in dimensoes:
+        cubo[d] = cubo[d].astype(object)
+    return cubo.sort_values(dimensoes, na_position='first').reset_index(drop=True)
+
+
+def _ranking_esperado(serie):
+    contagem = serie.astype(object).value_counts()
+    return sorted(contagem.items(), key=lambda item: (-item[1], item[0]))
+
+
+def test_serie_diaria_igual_ao_groupby(df_tratado):
+    cubo = construir_cubo(df_tratado)
+    esperado = df_tratado.groupby(df_tratado['data_unificada'].dt.normalize()).size()
+    pd.testing.assert_series_equal(serie_diaria(cubo), esperado, check_names=False)
+
+
+def test_totais_do_cubo(df_tratado):
+    cubo = construir_cubo(df_tratado)
+    assert cubo['acidentes'].sum() == len(df_tratado)
+    for col in COLUNAS_CONTAGEM:
+        assert cubo[col].sum() == df_tratado[col].sum()
+
+
+def test_graficos_iguais_ao_dataframe(df_tratado):
+    dados = graficos_do_cubo(construir_cubo(df_tratado))
+    datas = df_tratado['data_unificada']
+
+    por_ano = datas.dt.year.value_counts().sort_index()
+    assert dados['acidentes_ano'] == {'anos': por_ano.index.tolist(), 'valores': por_ano.tolist()}
+
+    por_dia = datas.dt.dayofweek.value_counts().reindex(range(7), fill_value=0)
+    assert dados['acidentes_dia']['valores'] == por_dia.tolist()
+
+    bairros = _ranking_esperado(df_tratado['bairro'])[:10]
+    assert list(zip(dados['top_bairros']['bairros'], dados['top_bairros']['valores'])) == bairros
+    naturezas = _ranking_esperado(df_tratado['natureza_acidente'])
+    assert list(zip(dados['natureza']['naturezas'], dados['natureza']['valores'])) == naturezas
+
+    por_hora = df_tratado['hora_limpa'].dropna().astype(int).value_counts().sort_index()
+    assert dados['hora_dia'] == {'horas': por_hora.index.tolist(), 'valores': por_hora.tolist()}
+
+    assert dados['veiculos']['valores'] == df_tratado[COLUNAS_VEICULOS].sum().astype(int).tolist()
+    assert dados['vitimas']['valores'] == df_tratado[COLUNAS_VITIMAS].sum().astype(int).tolist()
+
+    tabela = pd.crosstab(datas.dt.dayofweek, df_tratado['turno'].astype(object))
+    tabela = tabela.reindex(index=range(7), columns=dados['heatmap_turno_turnos'], fill_value=0)
+    assert dados['heatmap_turno'] == tabela.values.tolist()
+
+
+def test_graficos_filtrados(df_tratado):
+    cubo = construir_cubo(df_tratado)
+    dados = graficos_do_cubo(cubo, ano_inicio=2020, bairro=['DERBY', 'BOA VIAGEM'])
+    filtrado = df_tratado[(df_tratado['data_unificada'].dt.year >= 2020)
+                          & df_tratado['bairro'].isin(['DERBY', 'BOA VIAGEM'])]
+
+    assert sum(dados['acidentes_ano']['valores']) == len(filtrado)
+    assert set(dados['top_bairros']['bairros']) == {'DERBY', 'BOA VIAGEM'}
+    por_hora = filtrado['hora_limpa'].dropna().astype(int).value_counts().sort_index()
+    assert dados['hora_dia']['valores'] == por_hora.tolist()
+
+
+def test_combinar_cubos_igual_ao_cubo_inteiro(df_tratado):
+    partes = [construir_cubo(df_tratado.iloc[i:i + 700]) for i in range(0, len(df_tratado), 700)]
+    combinado = combinar_cubos(partes)
+    inteiro = construir_cubo(df_tratado)
+    pd.testing.assert_frame_equal(_ordenado(combinado), _ordenado(inteiro))
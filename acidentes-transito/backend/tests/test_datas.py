@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from src.datas import detectar_formato, parsear_datas, remover_bom, unificar_datas, BOM_LATIN1
+
+
+@pytest.mark.parametrize('valores,formato', [
+    (['2019-01-31', '2019-12-01'], '%Y-%m-%d'),
+    (['31/01/2019', '01/12/2019'], '%d/%m/%Y'),
+    (['01/02/2019', '03/04/2019'], '%d/%m/%Y'),  # ambíguo: dia primeiro
+    (['12/31/2019', '01/30/2019'], '%m/%d/%Y'),
+    (['2019-01-31 10:00:00'], '%Y-%m-%d %H:%M:%S'),
+])
+def test_detectar_formato(valores, formato):
+    assert detectar_formato(pd.Series(valores)) == formato
+
+
+def test_detectar_formato_sem_valores():
+    assert detectar_formato(pd.Series([None, None], dtype=object)) is None
+
+
+def test_parsear_com_valores_fora_do_formato():
+    valores = pd.Series(['31/01/2019', ' 01/02/2019 ', '2019-03-25', None], dtype=object)
+    datas = parsear_datas(valores, formato='%d/%m/%Y')
+    assert datas.tolist()[:3] == [pd.Timestamp('2019-01-31'), pd.Timestamp('2019-02-01'), pd.Timestamp('2019-03-25')]
+    assert pd.isna(datas.iloc[3])
+
+
+def test_remover_bom():
+    assert remover_bom([BOM_LATIN1 + 'data', '﻿hora', 'bairro', 3]) == ['data', 'hora', 'bairro', 3]
+
+
+def test_unificar_datas_com_layouts_e_bom():
+    # Arquivos com 'data', 'DATA' e o cabeçalho com BOM, já concatenados
+    df = pd.DataFrame({
+        'data': ['2019-01-31', None, None],
+        'DATA': [None, '15/02/2020', None],
+        BOM_LATIN1 + 'data': [None, None, '2016-07-04'],
+    })
+    assert unificar_datas(df).tolist() == [
+        pd.Timestamp('2019-01-31'), pd.Timestamp('2020-02-15'), pd.Timestamp('2016-07-04'),
+    ]
+
+
+def test_unificar_datas_prioridade():
+    df = pd.DataFrame({'data': ['2019-01-31'], 'DATA': ['01/01/2000']})
+    assert unificar_datas(df).iloc[0] == pd.Timestamp('2019-01-31')
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from src.esquema import compactar, COLUNAS_INTERMEDIARIAS
+
+
+def _tratado():
+    return pd.DataFrame({
+        'data': ['2020-01-01', '2020-01-02', '2020-01-03'],
+        'descricao': ['a', 'b', 'c'],
+        'descricao_limpa': ['a', 'b', 'c'],
+        'data_unificada': pd.to_datetime(['2020-01-01', '2020-01-02', '2020-01-03']),
+        'auto': [1.0, 0.0, 2.0],
+        'moto': [0.0, 300.0, 1.0],
+        'vitimas': [0.0, 0.5, 1.0],
+        'bairro': ['BOA VIAGEM', 'CENTRO', 'BOA VIAGEM'],
+        'turno': ['Manhã', 'Tarde', 'Noite'],
+        'ano': pd.array([2020, 2020, None], dtype='Int64'),
+        'mes': pd.array([1, 1, None], dtype='Int64'),
+        'hora_limpa': pd.array([8, None, 20], dtype='Int64'),
+        'numero': [12.0, '12,0', 'S/N'],
+    })
+
+
+def test_tipos_compactos():
+    df = compactar(_tratado())
+    assert df['auto'].dtype == np.uint8
+    assert df['moto'].dtype == np.uint16
+    # Frações não cabem em inteiro: a coluna fica como está
+    assert df['vitimas'].dtype == np.float64
+    assert df['bairro'].dtype == 'category'
+    assert df['turno'].dtype == 'category'
+    assert str(df['ano'].dtype) == 'Int16'
+    assert str(df['mes'].dtype) == 'Int8'
+    assert str(df['hora_limpa'].dtype) == 'Int8'
+    assert df['hora_limpa'].isna().tolist() == [False, True, False]
+    assert df['numero'].tolist() == ['12', '12', 'S/N']
+
+
+def test_remove_intermediarias_e_preserva_valores():
+    original = _tratado()
+    df = compactar(original)
+    assert not set(COLUNAS_INTERMEDIARIAS) & set(df.columns)
+    assert 'data_unificada' in df.columns and 'descricao_limpa' in df.columns
+    assert df['moto'].tolist() == [0, 300, 1]
+    assert df['bairro'].tolist() == original['bairro'].tolist()
+    # O DataFrame de entrada não é alterado
+    assert 'data' in original.columns
+    assert original['auto'].dtype == np.float64
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.janelas import janelas_defasagem
+
+
+def _laco_original(valores, dimension, stepahead_max):
+    # Montagem das defasagens do modelar_svr original, com pd.concat de shifts
+    serie = pd.Series(valores)
+    deslocado = pd.concat([serie.shift(i) for i in range(dimension + stepahead_max)], axis=1)
+    inicio = dimension + (stepahead_max - 1)
+    entrada = deslocado.iloc[inicio:, -dimension:]
+    alvos = [deslocado.iloc[inicio:, -(dimension + i + 1)] for i in range(stepahead_max)]
+    return entrada.to_numpy(), np.column_stack([a.to_numpy() for a in alvos])
+
+
+@pytest.mark.parametrize('dimension,stepahead_max', [(6, 12), (1, 1), (3, 5)])
+def test_igual_ao_laco_original(dimension, stepahead_max):
+    valores = np.random.RandomState(1).rand(60)
+    X, Y = janelas_defasagem(valores, dimension, stepahead_max)
+    X_esperado, Y_esperado = _laco_original(valores, dimension, stepahead_max)
+    np.testing.assert_array_equal(X, X_esperado)
+    np.testing.assert_array_equal(Y, Y_esperado)
+
+
+def test_views_somente_leitura():
+    X, Y = janelas_defasagem(np.arange(20.0), 4, 2)
+    assert X.shape == (15, 4) and Y.shape == (15, 2)
+    assert not X.flags.writeable and not Y.flags.writeable
+    np.testing.assert_array_equal(X[0], [3, 2, 1, 0])
+    np.testing.assert_array_equal(Y[0], [4, 5])
+
+
+def test_serie_curta():
+    with pytest.raises(ValueError):
+        janelas_defasagem(np.arange(5.0), 4, 2)
@@ -0,0 +1,66 @@
+import os
+import pytest
+from src import metricas
+
+W = f'worker="{os.getpid()}"'
+
+
+@pytest.fixture(autouse=True)
+def metricas_limpas():
+    metricas.limpar()
+    yield
+    metricas.limpar()
+
+
+def test_contador_e_medidor():
+    metricas.incrementar('eventos_total', 2, 'Eventos', origem='a')
+    metricas.incrementar('eventos_total', origem='a')
+    metricas.definir('fila', 1.5, 'Tamanho da fila')
+    assert metricas.exportar() == (
+        '# HELP acidentes_eventos_total Eventos\n'
+        '# TYPE acidentes_eventos_total counter\n'
+        f'acidentes_eventos_total{{origem="a",{W}}} 3\n'
+        '# HELP acidentes_fila Tamanho da fila\n'
+        '# TYPE acidentes_fila gauge\n'
+        f'acidentes_fila{{{W}}} 1.5\n'
+    )
+
+
+def test_histograma_acumulado():
+    metricas.observar('duracao', 0.02, 'Duração', etapa='x')
+    metricas.observar('duracao', 400.0, 'Duração', etapa='x')
+    linhas = metricas.exportar().splitlines()
+    assert linhas[:2] == ['# HELP acidentes_duracao Duração', '# TYPE acidentes_duracao histogram']
+    assert f'acidentes_duracao_bucket{{etapa="x",{W},le="0.01"}} 0' in linhas
+    assert f'acidentes_duracao_bucket{{etapa="x",{W},le="0.025"}} 1' in linhas
+    assert f'acidentes_duracao_bucket{{etapa="x",{W},le="300.0"}} 1' in linhas
+    assert f'acidentes_duracao_bucket{{etapa="x",{W},le="+Inf"}} 2' in linhas
+    assert f'acidentes_duracao_sum{{etapa="x",{W}}} 400.02' in linhas
+    assert linhas[-1] == f'acidentes_duracao_count{{etapa="x",{W}}} 2'
+
+
+def test_taxa_de_acerto_do_cache():
+    for acerto in (True, True, True, False):
+        metricas.registrar_cache('snapshot', acerto)
+    linhas = metricas.exportar().splitlines()
+    assert f'acidentes_cache_consultas_total{{cache="snapshot",resultado="acerto",{W}}} 3' in linhas
+    assert f'acidentes_cache_taxa_acerto{{cache="snapshot",{W}}} 0.75' in linhas
+
+
+def test_escape_dos_rotulos():
+    metricas.incrementar('x_total', rota='a"b\\c\nd')
+    assert f'acidentes_x_total{{rota="a\\"b\\\\c\\nd",{W}}} 1' in metricas.exportar().splitlines()
+
+
+def test_cronometrar_registra_erro():
+    with pytest.raises(ValueError):
+        with metricas.cronometrar('etapa_teste'):
+            raise ValueError
+    linhas = metricas.exportar().splitlines()
+    assert f'acidentes_etapa_execucoes_total{{etapa="etapa_teste",resultado="erro",{W}}} 1' in linhas
+
+
+def test_rotulo_worker_separa_processos(monkeypatch):
+    metricas.incrementar('eventos_total')
+    monkeypatch.setattr(metricas.os, 'getpid', lambda: 4242)
+    assert 'acidentes_eventos_total{worker="4242"} 1' in metricas.exportar().splitlines()
@@ -0,0 +1,59 @@
+import pytest
+from src import persistencia
+from src.persistencia import BackendMemoria, BackendSQLite, gravar_documentos
+
+
+@pytest.fixture(autouse=True)
+def hashes_limpos(monkeypatch, tmp_path):
+    # Os hashes da última gravação são globais por nome de backend
+    monkeypatch.setattr(persistencia, '_hashes', {})
+    monkeypatch.setattr(persistencia, 'PASTA_PERSISTENCIA', str(tmp_path))
+
+
+def _documentos(valor=1):
+    return {
+        ('previsoes', 'svr'): {'valores': [1, 2, 3], 'mae': 0.5},
+        ('previsoes_bairros', 'DERBY'): {'valores': [valor]},
+    }
+
+
+def test_memoria_grava_so_alterados():
+    backend = BackendMemoria()
+    assert gravar_documentos(_documentos(), backends=[backend]) == {'memoria': 2}
+    assert gravar_documentos(_documentos(), backends=[backend]) == {'memoria': 0}
+    assert gravar_documentos(_documentos(valor=2), backends=[backend]) == {'memoria': 1}
+    assert backend.lotes[-1] == [('previsoes_bairros', 'DERBY', {'valores': [2]})]
+    assert gravar_documentos(_documentos(valor=2), forcar=True, backends=[backend]) == {'memoria': 2}
+
+
+def test_ordem_das_chaves_nao_conta_como_alteracao():
+    backend = BackendMemoria()
+    gravar_documentos({('c', 'd'): {'a': 1, 'b': 2}}, backends=[backend])
+    assert gravar_documentos({('c', 'd'): {'b': 2, 'a': 1}}, backends=[backend]) == {'memoria': 0}
+
+
+def test_sqlite_hashes_sobrevivem_ao_processo(tmp_path):
+    caminho = str(tmp_path / 'previsoes.db')
+    assert gravar_documentos(_documentos(), backends=[BackendSQLite(caminho)]) == {'sqlite': 2}
+
+    # Novo processo: sem hashes em memória, lidos da própria tabela
+    persistencia._hashes.clear()
+    backend = BackendSQLite(caminho)
+    assert gravar_documentos(_documentos(), backends=[backend]) == {'sqlite': 0}
+    assert gravar_documentos(_documentos(valor=5), backends=[backend]) == {'sqlite': 1}
+    assert backend.ler('previsoes_bairros', 'DERBY') == {'valores': [5]}
+    assert len(backend.listar('previsoes')) == 1
+
+
+def test_falha_de_um_backend_nao_impede_os_demais():
+    class Quebrado(BackendMemoria):
+        nome = 'quebrado'
+
+        def gravar_lote(self, operacoes):
+            raise RuntimeError('fora do ar')
+
+    quebrado, memoria = Quebrado(), BackendMemoria()
+    assert gravar_documentos(_documentos(), backends=[quebrado, memoria]) == {'quebrado': None, 'memoria': 2}
+    # Os documentos que falharam são reenviados na próxima chamada
+    assert gravar_documentos(_documentos(), backends=[quebrado, memoria])['memoria'] == 0
+    assert persistencia._hashes['quebrado'] == {}
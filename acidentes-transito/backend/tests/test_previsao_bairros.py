@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import Ridge
+from src.cubo import construir_cubo
+from src.esquema import COLUNAS_CONTAGEM
+from src.janelas import janelas_defasagem
+from src.previsao_bairros import matriz_bairros, prever_bairros, PARAMETROS_BAIRROS
+
+
+def _cubo(datas, bairros):
+    df = pd.DataFrame({
+        'data_unificada': pd.to_datetime(datas),
+        'bairro': bairros,
+        'natureza_acidente': 'SEM VÍTIMA',
+        'tipo': 'COLISÃO',
+        'turno': 'Manhã',
+        'hora_limpa': 8.0,
+    })
+    for col in COLUNAS_CONTAGEM:
+        df[col] = 0
+    return construir_cubo(df)
+
+
+@pytest.fixture
+def cubo():
+    rng = np.random.RandomState(3)
+    dias = pd.date_range('2024-01-01', '2024-06-30', freq='D')
+    linhas = []
+    for bairro, media in (('DERBY', 3), ('IPSEP', 1), ('BOA VIAGEM', 5)):
+        for dia, n in zip(dias, rng.poisson(media, len(dias))):
+            linhas += [(dia, bairro)] * n
+    datas, bairros = zip(*linhas)
+    return _cubo(list(datas), list(bairros))
+
+
+def test_matriz_cobre_o_intervalo_pedido():
+    cubo = _cubo(['2024-01-03', '2024-01-03', '2024-01-05'], ['DERBY', 'IPSEP', 'DERBY'])
+    datas, bairros, matriz = matriz_bairros(cubo, inicio='2024-01-01', fim='2024-01-07')
+    assert datas[0] == pd.Timestamp('2024-01-01') and datas[-1] == pd.Timestamp('2024-01-07')
+    assert bairros == ['DERBY', 'IPSEP']
+    np.testing.assert_array_equal(matriz[:, 0], [0, 0, 1, 0, 1, 0, 0])
+    np.testing.assert_array_equal(matriz[:, 1], [0, 0, 1, 0, 0, 0, 0])
+
+
+def test_sem_bairros_no_intervalo():
+    cubo = _cubo(['2024-01-03'], ['DERBY'])
+    datas, bairros, matriz = matriz_bairros(cubo, inicio='2025-01-01', fim='2025-01-31', min_acidentes=1)
+    assert bairros == [] and matriz.shape == (31, 0)
+    assert prever_bairros(cubo, inicio='2025-01-01', fim='2025-01-31', n_jobs=1) == {}
+
+
+def test_igual_ao_modelo_de_cada_bairro(cubo):
+    previsoes = prever_bairros(cubo, n_jobs=1)
+    assert set(previsoes) == {'DERBY', 'IPSEP', 'BOA VIAGEM'}
+
+    p = PARAMETROS_BAIRROS
+    datas, bairros, matriz = matriz_bairros(cubo)
+    valores = matriz[:, bairros.index('DERBY')]
+    X, Y = janelas_defasagem(valores, p['dimensao'], p['horizonte'])
+    modelo = Ridge(alpha=p['alpha']).fit(X, Y)
+    esperado = np.clip(modelo.predict(valores[-p['dimensao']:][::-1].reshape(1, -1))[0], 0, None)
+
+    derby = previsoes['DERBY']
+    np.testing.assert_allclose(derby['previsao'], esperado)
+    assert derby['datas'][0] == '2024-07-01' and len(derby['datas']) == p['horizonte']
+    assert derby['mae'] >= 0 and derby['rmse'] >= derby['mae']
+
+
+def test_resultado_nao_depende_dos_lotes(cubo):
+    assert prever_bairros(cubo, n_jobs=1, lotes=1) == prever_bairros(cubo, n_jobs=1, lotes=3)
+
+
+def test_serie_curta(cubo):
+    with pytest.raises(ValueError):
+        prever_bairros(cubo, inicio='2024-06-01', fim='2024-06-30', n_jobs=1)
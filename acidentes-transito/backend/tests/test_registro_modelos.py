@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from src import registro_modelos
+from src.registro_modelos import obter_modelo, carregar_modelo, versao_modelo
+
+PARAMETROS = {'C': 1000.0, 'dimension': 6}
+
+
+def _serie(n=30, deslocamento=0.0):
+    return pd.Series(np.arange(n, dtype=float) + deslocamento,
+                     index=pd.date_range('2024-01-01', periods=n, freq='D'))
+
+
+class Treino:
+    # Conta os treinos e devolve um resultado no formato de modelar_svr
+    def __init__(self, espera=0.0):
+        self.chamadas = 0
+        self.espera = espera
+
+    def __call__(self, serie):
+        self.chamadas += 1
+        time.sleep(self.espera)
+        return {'previsao': [float(serie.iloc[-1])] * 6, 'mae': np.float64(1.5), 'mse': 2.0,
+                'rmse': 1.4142, 'mape': 10.0}
+
+
+def test_segunda_chamada_le_do_registro(tmp_path):
+    treinar = Treino()
+    resultado, metadados = obter_modelo('svr', _serie(), treinar, PARAMETROS, pasta=str(tmp_path))
+    salvo, metadados_salvos = obter_modelo('svr', _serie(), treinar, PARAMETROS, pasta=str(tmp_path))
+
+    assert treinar.chamadas == 1
+    assert salvo == resultado
+    assert metadados_salvos == metadados
+    assert metadados['versao'] == versao_modelo(_serie(), PARAMETROS)
+    assert metadados['metricas']['mae'] == 1.5
+    assert metadados['observacoes'] == 30 and metadados['parametros'] == PARAMETROS
+
+
+def test_serie_ou_parametros_novos_treinam_de_novo(tmp_path):
+    treinar = Treino()
+    pasta = str(tmp_path)
+    obter_modelo('svr', _serie(), treinar, PARAMETROS, pasta=pasta)
+    obter_modelo('svr', _serie(deslocamento=1.0), treinar, PARAMETROS, pasta=pasta)
+    obter_modelo('svr', _serie(), treinar, {**PARAMETROS, 'C': 10.0}, pasta=pasta)
+    obter_modelo('svr', _serie(), treinar, PARAMETROS, pasta=pasta, forcar=True)
+    assert treinar.chamadas == 4
+
+
+def test_versao_incompleta_e_ignorada(tmp_path):
+    pasta = str(tmp_path)
+    _, metadados = obter_modelo('svr', _serie(), Treino(), PARAMETROS, pasta=pasta)
+    os.remove(os.path.join(pasta, f"svr-{metadados['versao']}.json"))
+    assert carregar_modelo('svr', metadados['versao'], pasta) is None
+
+
+def test_versoes_antigas_sao_apagadas(tmp_path, monkeypatch):
+    monkeypatch.setattr(registro_modelos, 'VERSOES_MANTIDAS', 2)
+    pasta = str(tmp_path)
+    versoes = []
+    for i in range(4):
+        _, metadados = obter_modelo('svr', _serie(deslocamento=i), Treino(), PARAMETROS, pasta=pasta)
+        versoes.append(metadados['versao'])
+        # mtime distinto entre as versões
+        os.utime(os.path.join(pasta, f'svr-{metadados["versao"]}.json'), (i + 1, i + 1))
+
+    restantes = sorted(n for n in os.listdir(pasta) if n.endswith('.json'))
+    assert restantes == sorted(f'svr-{v}.json' for v in versoes[-2:])
+
+
+@pytest.mark.skipif(registro_modelos.fcntl is None, reason='trava entre processos precisa de fcntl')
+def test_chamadas_concorrentes_treinam_uma_vez(tmp_path):
+    treinar = Treino(espera=0.3)
+    resultados = []
+
+    def chamar():
+        resultados.append(obter_modelo('svr', _serie(), treinar, PARAMETROS, pasta=str(tmp_path))[0])
+
+    threads = [threading.Thread(target=chamar) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert treinar.chamadas == 1
+    assert len(resultados) == 3 and all(r == resultados[0] for r in resultados)
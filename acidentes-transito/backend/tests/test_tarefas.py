@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from src import tarefas
+from src.tarefas import iniciar_tarefa, status_tarefa
+
+
+@pytest.fixture(autouse=True)
+def pasta_tarefas(monkeypatch, tmp_path):
+    monkeypatch.setattr(tarefas, 'PASTA_TAREFAS', str(tmp_path))
+
+
+def _aguardar(id_tarefa, limite=10):
+    fim = time.time() + limite
+    while time.time() < fim:
+        tarefa = status_tarefa(id_tarefa)
+        if tarefa['status'] in ('concluida', 'erro'):
+            return tarefa
+        time.sleep(0.01)
+    raise AssertionError(f'Tarefa {id_tarefa} não terminou')
+
+
+def test_chamadas_concorrentes_compartilham_a_tarefa():
+    liberar = threading.Event()
+    chamadas = []
+
+    def funcao():
+        chamadas.append(1)
+        liberar.wait(10)
+        return {'ok': True}
+
+    id_tarefa, criada = iniciar_tarefa('teste_unico', funcao)
+    assert criada
+    for _ in range(3):
+        assert iniciar_tarefa('teste_unico', funcao) == (id_tarefa, False)
+
+    liberar.set()
+    tarefa = _aguardar(id_tarefa)
+    assert tarefa['status'] == 'concluida' and tarefa['resultado'] == {'ok': True}
+    assert len(chamadas) == 1
+
+    # Depois de concluída, uma nova chamada cria outra tarefa
+    novo_id, criada = iniciar_tarefa('teste_unico', lambda: None)
+    assert criada and novo_id != id_tarefa
+    _aguardar(novo_id)
+
+
+def test_erro_libera_o_tipo():
+    def falha():
+        raise RuntimeError('falhou')
+
+    id_tarefa, _ = iniciar_tarefa('teste_erro', falha)
+    tarefa = _aguardar(id_tarefa)
+    assert tarefa['status'] == 'erro' and tarefa['erro'] == 'falhou'
+    assert iniciar_tarefa('teste_erro', lambda: 1)[1]
+
+
+def test_status_lido_do_disco(monkeypatch):
+    id_tarefa, _ = iniciar_tarefa('teste_disco', lambda: 42)
+    _aguardar(id_tarefa)
+    # Outro worker não tem a tarefa em memória
+    monkeypatch.setattr(tarefas, '_tarefas', {})
+    assert status_tarefa(id_tarefa)['resultado'] == 42
+    assert status_tarefa('../fora') is None
+    assert status_tarefa('0' * 32) is None
+
+
+# Outro worker: inicia uma tarefa que só termina quando recebe uma linha no stdin
+OUTRO_WORKER = """
+import sys, threading
+from src import tarefas
+tarefas.PASTA_TAREFAS = sys.argv[1]
+fim = threading.Event()
+id_tarefa, _ = tarefas.iniciar_tarefa('teste_processos', lambda: fim.wait(30) and 'outro')
+print(id_tarefa, flush=True)
+sys.stdin.readline()
+fim.set()
+tarefas._obter_executor().shutdown(wait=True)
+"""
+
+
+@pytest.mark.skipif(tarefas.fcntl is None, reason='trava entre processos precisa de fcntl')
+def test_tarefa_de_outro_worker_e_compartilhada(tmp_path):
+    backend = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    outro = subprocess.Popen([sys.executable, '-c', OUTRO_WORKER, str(tmp_path)], cwd=backend,
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        id_outro = outro.stdout.readline().strip()
+        assert id_outro
+
+        chamadas = []
+        assert iniciar_tarefa('teste_processos', lambda: chamadas.append(1)) == (id_outro, False)
+        assert status_tarefa(id_outro)['status'] in ('pendente', 'executando')
+
+        outro.stdin.write('\n')
+        outro.stdin.flush()
+        assert outro.wait(30) == 0
+    finally:
+        outro.kill()
+
+    assert status_tarefa(id_outro)['resultado'] == 'outro'
+    assert chamadas == []
+    # Com a trava liberada, este worker já pode criar a próxima
+    novo_id, criada = iniciar_tarefa('teste_processos', lambda: 'este')
+    assert criada and novo_id != id_outro
+    assert _aguardar(novo_id)['resultado'] == 'este'
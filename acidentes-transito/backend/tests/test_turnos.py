@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.turnos import classificar_turnos, classificar_turno, extrair_horas, INDEFINIDO
+
+
+@pytest.mark.parametrize('hora,turno', [
+    (0, 'Madrugada'), (4, 'Madrugada'),
+    (5, 'Manhã'), (11, 'Manhã'),
+    (12, 'Tarde'), (16, 'Tarde'),
+    (17, 'Noite'), (20, 'Noite'),
+    (21, 'Madrugada'), (23, 'Madrugada'),
+])
+def test_limites(hora, turno):
+    assert classificar_turno(hora) == turno
+
+
+def test_vetorizado_e_nulos():
+    horas = pd.Series([4.0, 5.0, np.nan, 21.0], index=[10, 11, 12, 13])
+    turnos = classificar_turnos(horas)
+    assert turnos.tolist() == ['Madrugada', 'Manhã', INDEFINIDO, 'Madrugada']
+    assert turnos.index.tolist() == [10, 11, 12, 13]
+
+
+def test_limites_personalizados():
+    limites = [(6, 'Dia'), (18, 'Noite')]
+    assert classificar_turnos(pd.Series([5, 6, 17, 18]), limites).tolist() == ['Noite', 'Dia', 'Dia', 'Noite']
+
+
+def test_extrair_horas():
+    valores = pd.Series(['11:36:00', ' 7:05', '24:00', 'sem hora', None, '00:10'], dtype=object)
+    horas = extrair_horas(valores)
+    assert horas.tolist()[:2] == [11.0, 7.0]
+    assert horas.iloc[2:5].isna().all()
+    assert horas.iloc[5] == 0.0
@@ -0,0 +1,25 @@
+import pandas as pd
+from src.utils import limpar_descricao, limpar_descricoes
+
+
+def test_lote_igual_linha_a_linha():
+    textos = pd.Series([
+        'Colisão entre AUTO e moto na Av. Norte, às 18h!!',
+        'Pedestre atropelado; vítima socorrida ao HR',
+        "Driver can't stop - didn't brake",
+        'de da do em na no',
+        '',
+        '123 456 ---',
+        'Ônibus   com\tmotorista\nferido',
+    ], index=[5, 3, 9, 1, 7, 2, 8])
+    esperado = textos.map(limpar_descricao)
+    resultado = limpar_descricoes(textos)
+    assert resultado.tolist() == esperado.tolist()
+    assert resultado.index.tolist() == textos.index.tolist()
+
+
+def test_sem_palavras():
+    textos = pd.Series(['', '!!', '42'], index=[4, 5, 6])
+    resultado = limpar_descricoes(textos)
+    assert resultado.tolist() == ['', '', '']
+    assert resultado.index.tolist() == [4, 5, 6]
@@ -0,0 +1,22 @@
+"""
+Ponto de entrada de produção.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Com preload_app (gunicorn.conf.py), este módulo é importado uma única vez no
+processo mestre: dados, cubo, gráficos e modelos são carregados antes do fork
+e compartilhados pelos workers (copy-on-write), em vez de cada worker repetir
+a carga, o tratamento e o treino. No mestre nada cria pools de processos,
+threads ou clientes de rede: isso só acontece nos workers, depois do fork.
+
+Em produção as previsões vão para o SQLite local e para o Firestore, de onde o
+dashboard (src/App.js) as lê. Defina PERSISTENCIA para mudar isso (ex.:
+PERSISTENCIA=sqlite para rodar sem Firebase).
+"""
+import os
+
+os.environ.setdefault('PERSISTENCIA', 'sqlite,firestore')
+
+from app import create_app  # noqa: E402
+
+app = create_app(processo_mestre=True)
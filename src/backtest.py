@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from statsmodels.tsa.arima.model import ARIMA
+import warnings
+warnings.filterwarnings('ignore')
+
+MODOS = ('refit', 'append', 'extend')
+
+
+def _ajustar(valores, order, seasonal_order):
+    return ARIMA(valores, order=order, seasonal_order=seasonal_order).fit()
+
+
+def _atualizar(resultado, novos, modo):
+    # Incorpora as observações novas sem reestimar os parâmetros
+    if modo == 'append':
+        # Refaz o filtro sobre toda a série, mantendo os parâmetros
+        return resultado.append(novos, refit=False)
+    # 'extend': filtra só as observações novas a partir do último estado
+    return resultado.extend(novos)
+
+
+def _metricas(reais, previstos):
+    erros = reais - previstos
+    mascara = reais != 0
+    return {
+        'mae': float(np.mean(np.abs(erros))),
+        'rmse': float(np.sqrt(np.mean(erros ** 2))),
+        'mape': float(np.mean(np.abs(erros[mascara] / reais[mascara])) * 100) if mascara.any() else np.nan,
+    }
+
+
+def _avaliar_bloco(valores, origens, horizonte, modo, order, seasonal_order):
+    # Ajuste completo na primeira origem do bloco e atualização nas demais
+    linhas = []
+    resultado = None
+    anterior = None
+    for origem in origens:
+        if resultado is None or modo == 'refit':
+            resultado = _ajustar(valores[:origem], order, seasonal_order)
+        else:
+            resultado = _atualizar(resultado, valores[anterior:origem], modo)
+        anterior = origem
+
+        previstos = np.asarray(resultado.forecast(horizonte), dtype=float)
+        reais = valores[origem:origem + horizonte]
+        linhas.append((origem, previstos[:len(reais)], reais))
+    return linhas
+
+
+def backtest_arima(serie, order=(4, 2, 0), seasonal_order=(0, 0, 0, 0), inicio=None, fim=None,
+                   horizonte=1, passo=1, modo='extend', refit_cada=30, n_jobs=1):
+    """
+    Avaliação com origem móvel (rolling origin) de um ARIMA: em cada origem t o
+    modelo conhece serie[:t] e prevê os `horizonte` dias seguintes.
+
+    Modos:
+    - 'refit': reestima o ARIMA do zero em toda origem (o laço do notebook)
+    - 'append': mantém os parâmetros e refaz o filtro com as novas observações
+    - 'extend': mantém os parâmetros e só filtra as novas observações (mais rápido)
+
+    Nos modos 'append' e 'extend' o modelo é reestimado a cada `refit_cada`
+    origens. Cada bloco de `refit_cada` origens é independente, então os blocos
+    rodam em paralelo e o resultado não depende de n_jobs.
+
+    Parâmetros:
+    - serie: Series diária (ex.: saída de serie_diaria, com asfreq('D'))
+    - order, seasonal_order: ordens do ARIMA
+    - inicio: primeira origem (posição inteira ou data); padrão: 80% da série
+    - fim: última origem (exclusiva, posição ou data); padrão: fim da série
+    - horizonte: passos previstos em cada origem
+    - passo: distância entre origens consecutivas
+    - modo: 'refit', 'append' ou 'extend'
+    - refit_cada: origens entre reestimações completas (None = só na primeira)
+    - n_jobs: processos usados para avaliar os blocos, como no joblib
+
+    Retorna:
+    - dicionário com:
+      - por_origem: DataFrame com mae, rmse e mape de cada origem
+      - previsoes: DataFrame com real e previsto de cada origem e passo
+      - mae, rmse, mape: métricas sobre todas as previsões
+    """
+    if modo not in MODOS:
+        raise ValueError(f"modo deve ser um de {MODOS}, recebido: {modo!r}")
+
+    serie = serie.fillna(0)
+    valores = serie.to_numpy(dtype=float)
+    n = len(valores)
+
+    def _posicao(valor, padrao):
+        if valor is None:
+            return padrao
+        if isinstance(valor, (int, np.integer)):
+            return int(valor)
+        return int(serie.index.searchsorted(pd.Timestamp(valor)))
+
+    inicio = _posicao(inicio, int(n * 0.8))
+    fim = min(_posicao(fim, n), n)
+    origens = list(range(inicio, fim, passo))
+    if not origens:
+        raise ValueError(f"Nenhuma origem entre {inicio} e {fim}.")
+    if inicio < 1:
+        raise ValueError("A primeira origem precisa de pelo menos uma observação de treino.")
+
+    # No modo 'refit' toda origem é independente
+    if modo == 'refit':
+        tamanho = 1
+    else:
+        tamanho = refit_cada or len(origens)
+    blocos = [origens[i:i + tamanho] for i in range(0, len(origens), tamanho)]
+
+    print(f"Backtest ARIMA{order} modo={modo}: {len(origens)} origens em {len(blocos)} blocos")
+    resultados = Parallel(n_jobs=n_jobs)(
+        delayed(_avaliar_bloco)(valores, bloco, horizonte, modo, order, seasonal_order)
+        for bloco in blocos
+    )
+
+    por_origem = []
+    previsoes = []
+    for origem, previstos, reais in (linha for bloco in resultados for linha in bloco):
+        data_origem = serie.index[origem]
+        por_origem.append({'origem': data_origem, **_metricas(reais, previstos)})
+        for passo_h, (real, previsto) in enumerate(zip(reais, previstos), start=1):
+            previsoes.append({
+                'origem': data_origem,
+                'passo': passo_h,
+                'data': serie.index[origem + passo_h - 1],
+                'real': real,
+                'previsto': previsto,
+            })
+
+    previsoes = pd.DataFrame(previsoes)
+    gerais = _metricas(previsoes['real'].to_numpy(), previsoes['previsto'].to_numpy())
+
+    return {
+        'por_origem': pd.DataFrame(por_origem).set_index('origem'),
+        'previsoes': previsoes,
+        **gerais,
+    }
@@ -1,24 +1,115 @@
 import pandas as pd
+import hashlib
+import json
 import os
 print(os.getcwd())
 
+# Cada CSV lido é guardado como uma partição própria; o manifesto registra com
+# qual assinatura (mtime e tamanho) ele foi lido, para só reler os que mudaram
+PASTA_CACHE = 'cache/'
+PASTA_PARTICOES = os.path.join(PASTA_CACHE, 'particoes')
+ARQUIVO_MANIFESTO = os.path.join(PASTA_CACHE, 'manifesto.json')
 
-def carregar_dados():
+
+def _assinatura(arquivo):
+    st = os.stat(arquivo)
+    return {'mtime_ns': st.st_mtime_ns, 'tamanho': st.st_size}
+
+
+def _carregar_manifesto():
+    if not os.path.exists(ARQUIVO_MANIFESTO):
+        return {}
+    try:
+        with open(ARQUIVO_MANIFESTO, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f'Manifesto inválido, relendo todos os arquivos: {e}')
+        return {}
+
+
+def _salvar_manifesto(manifesto, arquivos_csv):
+    # Mantém só os CSVs ainda presentes e apaga as partições sem referência
+    presentes = {os.path.abspath(a) for a in arquivos_csv}
+    manifesto = {a: info for a, info in manifesto.items() if a in presentes}
+
+    os.makedirs(PASTA_CACHE, exist_ok=True)
+    tmp = ARQUIVO_MANIFESTO + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, ARQUIVO_MANIFESTO)
+
+    if os.path.isdir(PASTA_PARTICOES):
+        usadas = {info['particao'] for info in manifesto.values()}
+        for nome in os.listdir(PASTA_PARTICOES):
+            if nome not in usadas:
+                os.remove(os.path.join(PASTA_PARTICOES, nome))
+
+
+def _carregar_particao(arquivo, manifesto):
+    info = manifesto.get(os.path.abspath(arquivo))
+    if info is None or info['assinatura'] != _assinatura(arquivo):
+        return None
+    caminho = os.path.join(PASTA_PARTICOES, info['particao'])
+    if not os.path.exists(caminho):
+        return None
+    try:
+        return pd.read_pickle(caminho)
+    except Exception as e:
+        print(f'Erro ao ler partição de {arquivo}: {e}')
+        return None
+
+
+def _salvar_particao(arquivo, df, manifesto):
+    os.makedirs(PASTA_PARTICOES, exist_ok=True)
+    arquivo = os.path.abspath(arquivo)
+    assinatura = _assinatura(arquivo)
+    nome = hashlib.sha256(json.dumps([arquivo, assinatura]).encode('utf-8')).hexdigest()[:32] + '.pkl'
+    destino = os.path.join(PASTA_PARTICOES, nome)
+    df.to_pickle(destino + '.tmp')
+    os.replace(destino + '.tmp', destino)
+    manifesto[arquivo] = {'assinatura': assinatura, 'particao': nome, 'linhas': int(df.shape[0])}
+
+
+def carregar_dados(usar_cache=True):
+    """
+    Lê todos os CSVs da pasta csvs e junta em um único DataFrame.
+
+    Parâmetros:
+    - usar_cache: reaproveita os arquivos já lidos (pasta cache/); só os CSVs
+      novos ou alterados desde a última carga são lidos de novo
+
+    Retorna:
+    - DataFrame com os registros de todos os arquivos, na ordem dos nomes
+    """
     pasta = 'csvs/'
-    arquivos_csv = [os.path.join(pasta, f) for f in os.listdir(pasta) if f.endswith('.csv')]
+    # Ordem fixa por nome para que a concatenação seja determinística
+    arquivos_csv = sorted(os.path.join(pasta, f) for f in os.listdir(pasta) if f.endswith('.csv'))
+
+    manifesto = _carregar_manifesto() if usar_cache else {}
 
     dfs = []
     for arquivo in arquivos_csv:
+        df_temp = _carregar_particao(arquivo, manifesto) if usar_cache else None
+        if df_temp is not None:
+            dfs.append(df_temp)
+            print(f'✅ Em cache: {arquivo}')
+            continue
         try:
             df_temp = pd.read_csv(arquivo, encoding='latin1',sep=';')
             dfs.append(df_temp)
             print(f'✅ Lido: {arquivo}')
         except Exception as e:
             print(f'❌ Erro ao ler {arquivo}: {e}')
+            continue
+        if usar_cache:
+            _salvar_particao(arquivo, df_temp, manifesto)
+
+    if usar_cache:
+        _salvar_manifesto(manifesto, arquivos_csv)
 
     # Junta todos os dataframes válidos
     df = pd.concat(dfs, ignore_index=True)
     print(f'\nTotal de arquivos lidos com sucesso: {len(dfs)}')
     print(f'Total de registros: {df.shape[0]}')
-    
-    return df
\ No newline at end of file
+
+    return df
@@ -1,7 +1,22 @@
+import pandas as pd
 from pmdarima import auto_arima
 from sklearn.metrics import mean_absolute_error
+from src.backtest import backtest_arima
 
-def modelar_arima_automatico(y_train, y_test):
+def modelar_arima_automatico(y_train, y_test, backtest=None):
+    """
+    Ajusta um ARIMA com auto_arima no treino e avalia no teste com um único corte.
+
+    Parâmetros:
+    - y_train, y_test: Series de treino e teste (ex.: saída de dividir_modelagem_2)
+    - backtest: se informado (True ou dicionário com opções de backtest_arima,
+      ex.: {'modo': 'extend', 'horizonte': 7}), avalia também com origem móvel
+      ao longo do teste, usando a ordem escolhida pelo auto_arima
+
+    Retorna:
+    - dicionário com modelo, melhor_ordem, mae_test, previsao_test e, se
+      pedido, backtest (saída de backtest_arima)
+    """
     modelo = auto_arima(
         y_train,
         seasonal=False,
@@ -21,7 +36,7 @@ def modelar_arima_automatico(y_train, y_test):
     previsao_test = modelo.predict(n_periods=len(y_test))
     mae_test = mean_absolute_error(y_test, previsao_test)
 
-    return {
+    resultado = {
         'modelo': modelo,
         'melhor_ordem': modelo.order,
         # 'mae_val': mae_val,
@@ -29,3 +44,12 @@ def modelar_arima_automatico(y_train, y_test):
         # 'previsao_val': previsao_val,
         'previsao_test': previsao_test
     }
+
+    if backtest:
+        opcoes = {'order': modelo.order, 'inicio': len(y_train)}
+        if isinstance(backtest, dict):
+            opcoes.update(backtest)
+        serie = pd.concat([y_train, y_test])
+        resultado['backtest'] = backtest_arima(serie, **opcoes)
+
+    return resultado
@@ -1,8 +1,6 @@
-from prophet import Prophet
 from sklearn.metrics import mean_absolute_error
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 # Função de erro percentual médio absoluto (MAPE)
 def mape(y_true, y_pred):
@@ -13,7 +11,18 @@ def mape(y_true, y_pred):
     return np.mean(np.abs((y_true[mask] - y_pred[mask]) / y_true[mask])) * 100
 
 # Função principal com melhorias
-def modelar_prophet(serie, horizonte=1, reamostragem='W', remover_negativos=True):
+def modelar_prophet(serie, horizonte=1, reamostragem='W', remover_negativos=True, plotar=True):
+    """
+    Prophet na série reamostrada, com divisão 60/20/20: ajustado no treino
+    para a validação e em treino + validação para o teste e o horizonte.
+
+    Parâmetros:
+    - plotar: gera o gráfico de src.relatorios; com False só calcula (sem
+      importar matplotlib)
+    """
+    # O prophet importa o matplotlib.pyplot ao ser importado: só entra aqui
+    from prophet import Prophet
+
     # Reamostragem semanal para suavizar a série, se necessário
     df = pd.DataFrame({'ds': serie.index, 'y': serie.values})
     df = df.resample(reamostragem, on='ds').mean().reset_index()
@@ -93,23 +102,9 @@ def modelar_prophet(serie, horizonte=1, reamostragem='W', remover_negativos=True
     print(f"Previsão para o próximo período ({horizon_date.date()}): {horizon_pred:.2f}")
 
     # Plotagem
-    plt.figure(figsize=(14, 6))
-    plt.plot(df_train['ds'], df_train['y'], label='Treino', color='blue', alpha=0.7)
-    plt.plot(df_val['ds'], df_val['y'], label='Validação Real', color='green', alpha=0.7)
-    plt.plot(previsoes_val.index, previsoes_val['yhat'], '--', label='Validação Prevista', color='lime', alpha=0.8)
-    plt.plot(df_test['ds'], df_test['y'], label='Teste Real', color='red', alpha=0.7)
-    plt.plot(previsoes_teste.index, previsoes_teste['yhat'], '--', label='Teste Previsto', color='orange', alpha=0.8)
-
-    plt.axvline(df_val['ds'].iloc[0], color='black', linestyle='--', label='Início Validação')
-    plt.axvline(df_test['ds'].iloc[0], color='gray', linestyle='--', label='Início Teste')
-
-    plt.title('Prophet - Previsão com Treino, Validação e Teste (Suavizado)')
-    plt.xlabel('Data')
-    plt.ylabel('Valor')
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
+    if plotar:
+        from src.relatorios import plotar_prophet
+        plotar_prophet(df_train, df_val, df_test, previsoes_val, previsoes_teste)
 
     return {
         'previsao_val': previsoes_val['yhat'].values,
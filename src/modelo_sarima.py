@@ -1,7 +1,3 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import statsmodels.api as sm
-from pmdarima import auto_arima
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 from statsmodels.tsa.stattools import adfuller
 from sklearn.preprocessing import MinMaxScaler
@@ -23,7 +19,23 @@ def testar_estacionariedade(y):
     print(f"p-valor: {p_valor:.4f}")
     return p_valor < 0.05
 
-def modelar_sarima_automatico(y_train, y_val, y_test, m):
+def modelar_sarima_automatico(y_train, y_val, y_test, m, plotar=True):
+    """
+    SARIMA com ordem escolhida pelo auto_arima no treino normalizado; prevê a
+    validação e, atualizado com ela, o teste.
+
+    Parâmetros:
+    - m: período sazonal
+    - plotar: gera os gráficos de src.relatorios; com False só calcula (sem
+      importar matplotlib, seaborn ou statsmodels.api)
+
+    Retorna:
+    - dicionário com modelo, ordens, aic, métricas de validação e teste,
+      previsões e resíduos do teste
+    """
+    # O pmdarima importa o matplotlib.pyplot ao ser importado: só entra aqui
+    from pmdarima import auto_arima
+
     # Normalização
     scaler = MinMaxScaler()
     y_train_scaled = scaler.fit_transform(y_train.values.reshape(-1, 1)).flatten()
@@ -64,47 +76,11 @@ def modelar_sarima_automatico(y_train, y_val, y_test, m):
     rmse_test = mean_squared_error(y_test, previsao_test, squared=False)
     mape_test = mean_absolute_percentage_error(y_test, previsao_test)
 
-    # PLOTS
-    plt.figure(figsize=(12, 4))
-    plt.plot(y_val.index, y_val, label='Real')
-    plt.plot(y_val.index, previsao_val, label='Previsão', color='orange')
-    plt.title('Validação - Real vs Previsão')
-    plt.xlabel('Data')
-    plt.ylabel('Valor')
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
-
-    plt.figure(figsize=(12, 4))
-    plt.plot(y_test.index, y_test, label='Real')
-    plt.plot(y_test.index, previsao_test, label='Previsão', color='orange')
-    plt.title('Teste - Real vs Previsão')
-    plt.xlabel('Data')
-    plt.ylabel('Valor')
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
-
     residuos = pd.Series(y_test.values - previsao_test, index=y_test.index)
 
-    plt.figure(figsize=(12, 4))
-    plt.plot(residuos.index, residuos)
-    plt.title('Resíduos no Teste')
-    plt.axhline(0, color='red', linestyle='--')
-    plt.xlabel('Data')
-    plt.tight_layout()
-    plt.show()
-
-    plt.figure(figsize=(6, 4))
-    sns.histplot(residuos, kde=True, bins=30)
-    plt.title('Distribuição dos Resíduos')
-    plt.tight_layout()
-    plt.show()
-
-    sm.qqplot(residuos, line='s')
-    plt.title('QQ-Plot dos Resíduos')
-    plt.tight_layout()
-    plt.show()
+    if plotar:
+        from src.relatorios import plotar_sarima
+        plotar_sarima(y_val, previsao_val, y_test, previsao_test)
 
     return {
         'modelo': modelo,
@@ -118,10 +94,22 @@ def modelar_sarima_automatico(y_train, y_val, y_test, m):
         'rmse_test': rmse_test,
         'mape_test': mape_test,
         'previsao_val': previsao_val,
-        'previsao_test': previsao_test
+        'previsao_test': previsao_test,
+        'residuos_test': residuos.values
     }
 
-def modelar_sarima_manual(y_train, y_val, y_test, order, seasonal_order):
+def modelar_sarima_manual(y_train, y_val, y_test, order, seasonal_order, plotar=True):
+    """
+    SARIMA com ordem fixa: ajustado no treino normalizado para prever a
+    validação e reajustado em treino + validação para prever o teste.
+
+    Parâmetros:
+    - plotar: gera os gráficos de src.relatorios; com False só calcula
+
+    Retorna:
+    - dicionário com o modelo final, métricas de validação e teste,
+      previsões e resíduos do teste
+    """
     from statsmodels.tsa.statespace.sarimax import SARIMAX
 
     # Normalização
@@ -152,47 +140,11 @@ def modelar_sarima_manual(y_train, y_val, y_test, order, seasonal_order):
     rmse_test = mean_squared_error(y_test, previsao_test, squared=False)
     mape_test = mean_absolute_percentage_error(y_test, previsao_test)
 
-    # PLOTS
-    plt.figure(figsize=(12, 4))
-    plt.plot(y_val.index, y_val, label='Real')
-    plt.plot(y_val.index, previsao_val, label='Previsão', color='orange')
-    plt.title('Validação - Real vs Previsão (Manual)')
-    plt.xlabel('Data')
-    plt.ylabel('Valor')
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
-
-    plt.figure(figsize=(12, 4))
-    plt.plot(y_test.index, y_test, label='Real')
-    plt.plot(y_test.index, previsao_test, label='Previsão', color='orange')
-    plt.title('Teste - Real vs Previsão (Manual)')
-    plt.xlabel('Data')
-    plt.ylabel('Valor')
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
-
     residuos = pd.Series(y_test.values - previsao_test, index=y_test.index)
 
-    plt.figure(figsize=(12, 4))
-    plt.plot(residuos.index, residuos)
-    plt.title('Resíduos no Teste (Manual)')
-    plt.axhline(0, color='red', linestyle='--')
-    plt.xlabel('Data')
-    plt.tight_layout()
-    plt.show()
-
-    plt.figure(figsize=(6, 4))
-    sns.histplot(residuos, kde=True, bins=30)
-    plt.title('Distribuição dos Resíduos (Manual)')
-    plt.tight_layout()
-    plt.show()
-
-    sm.qqplot(residuos, line='s')
-    plt.title('QQ-Plot dos Resíduos (Manual)')
-    plt.tight_layout()
-    plt.show()
+    if plotar:
+        from src.relatorios import plotar_sarima
+        plotar_sarima(y_val, previsao_val, y_test, previsao_test, sufixo=' (Manual)')
 
     return {
         'modelo': resultado_full,
@@ -203,5 +155,6 @@ def modelar_sarima_manual(y_train, y_val, y_test, order, seasonal_order):
         'rmse_test': rmse_test,
         'mape_test': mape_test,
         'previsao_val': previsao_val,
-        'previsao_test': previsao_test
+        'previsao_test': previsao_test,
+        'residuos_test': residuos.values
     }
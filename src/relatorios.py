@@ -0,0 +1,88 @@
+import pandas as pd
+
+
+def _importar_graficos():
+    # Importados só quando algum gráfico é pedido
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import statsmodels.api as sm
+    return plt, sns, sm
+
+
+def plotar_sarima(y_val, previsao_val, y_test, previsao_test, sufixo=''):
+    """
+    Gráficos de avaliação de modelar_sarima_automatico e modelar_sarima_manual:
+    real x previsto na validação e no teste, resíduos do teste ao longo do
+    tempo, histograma e QQ-plot dos resíduos.
+
+    Parâmetros:
+    - sufixo: texto acrescentado aos títulos (ex.: ' (Manual)')
+    """
+    plt, sns, sm = _importar_graficos()
+
+    plt.figure(figsize=(12, 4))
+    plt.plot(y_val.index, y_val, label='Real')
+    plt.plot(y_val.index, previsao_val, label='Previsão', color='orange')
+    plt.title(f'Validação - Real vs Previsão{sufixo}')
+    plt.xlabel('Data')
+    plt.ylabel('Valor')
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+    plt.figure(figsize=(12, 4))
+    plt.plot(y_test.index, y_test, label='Real')
+    plt.plot(y_test.index, previsao_test, label='Previsão', color='orange')
+    plt.title(f'Teste - Real vs Previsão{sufixo}')
+    plt.xlabel('Data')
+    plt.ylabel('Valor')
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+    residuos = pd.Series(y_test.values - previsao_test, index=y_test.index)
+
+    plt.figure(figsize=(12, 4))
+    plt.plot(residuos.index, residuos)
+    plt.title(f'Resíduos no Teste{sufixo}')
+    plt.axhline(0, color='red', linestyle='--')
+    plt.xlabel('Data')
+    plt.tight_layout()
+    plt.show()
+
+    plt.figure(figsize=(6, 4))
+    sns.histplot(residuos, kde=True, bins=30)
+    plt.title(f'Distribuição dos Resíduos{sufixo}')
+    plt.tight_layout()
+    plt.show()
+
+    sm.qqplot(residuos, line='s')
+    plt.title(f'QQ-Plot dos Resíduos{sufixo}')
+    plt.tight_layout()
+    plt.show()
+
+
+def plotar_prophet(df_train, df_val, df_test, previsoes_val, previsoes_teste):
+    """
+    Gráfico de modelar_prophet: treino, validação e teste reais com as
+    previsões suavizadas de validação e teste.
+    """
+    plt, _, _ = _importar_graficos()
+
+    plt.figure(figsize=(14, 6))
+    plt.plot(df_train['ds'], df_train['y'], label='Treino', color='blue', alpha=0.7)
+    plt.plot(df_val['ds'], df_val['y'], label='Validação Real', color='green', alpha=0.7)
+    plt.plot(previsoes_val.index, previsoes_val['yhat'], '--', label='Validação Prevista', color='lime', alpha=0.8)
+    plt.plot(df_test['ds'], df_test['y'], label='Teste Real', color='red', alpha=0.7)
+    plt.plot(previsoes_teste.index, previsoes_teste['yhat'], '--', label='Teste Previsto', color='orange', alpha=0.8)
+
+    plt.axvline(df_val['ds'].iloc[0], color='black', linestyle='--', label='Início Validação')
+    plt.axvline(df_test['ds'].iloc[0], color='gray', linestyle='--', label='Início Teste')
+
+    plt.title('Prophet - Previsão com Treino, Validação e Teste (Suavizado)')
+    plt.xlabel('Data')
+    plt.ylabel('Valor')
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.show()